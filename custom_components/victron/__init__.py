@@ -6,8 +6,25 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 
-from .const import CONF_HOST, CONF_INTERVAL, CONF_PORT, DOMAIN, SCAN_REGISTERS
+from .const import (
+    CONF_ADVANCED_OPTIONS,
+    CONF_CONNECTIONS,
+    CONF_HOST,
+    CONF_INTERVAL,
+    CONF_MAX_IN_FLIGHT,
+    CONF_PIPELINE_DEPTH,
+    CONF_POLL_TIERS,
+    CONF_PORT,
+    CONF_WRITE_WINDOW,
+    DEFAULT_WRITE_WINDOW,
+    DOMAIN,
+    POLL_CONNECTIONS,
+    POLL_MAX_IN_FLIGHT,
+    POLL_PIPELINE_DEPTH,
+    SCAN_REGISTERS,
+)
 from .coordinator import victronEnergyDeviceUpdateCoordinator as Coordinator
+from .fingerprint import async_rescan_entry, async_validate_entry
 
 PLATFORMS: list[Platform] = [
     Platform.SENSOR,
@@ -28,12 +45,22 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     # TODO 3. Store an API object for your platforms to access
     # hass.data[DOMAIN][entry.entry_id] = MyApi(...)
 
+    changed_fingerprint = await async_validate_entry(hass, config_entry)
+
     coordinator = Coordinator(
         hass,
         config_entry.options[CONF_HOST],
         config_entry.options[CONF_PORT],
         config_entry.data[SCAN_REGISTERS],
         config_entry.options[CONF_INTERVAL],
+        poll_tiers=config_entry.options.get(CONF_POLL_TIERS),
+        write_window=config_entry.options.get(CONF_WRITE_WINDOW, DEFAULT_WRITE_WINDOW),
+        connections=config_entry.options.get(CONF_CONNECTIONS, POLL_CONNECTIONS),
+        max_in_flight=config_entry.options.get(CONF_MAX_IN_FLIGHT, POLL_MAX_IN_FLIGHT),
+        pipeline_depth=config_entry.options.get(
+            CONF_PIPELINE_DEPTH, POLL_PIPELINE_DEPTH
+        ),
+        advanced_options=config_entry.options[CONF_ADVANCED_OPTIONS],
     )
     # try:
     #     await coordinator.async_config_entry_first_refresh()
@@ -48,6 +75,13 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     await coordinator.async_config_entry_first_refresh()
     config_entry.async_on_unload(config_entry.add_update_listener(update_listener))
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+    if changed_fingerprint is not None:
+        # a full scan can take minutes, the entry reloads once it is done
+        config_entry.async_create_background_task(
+            hass,
+            async_rescan_entry(hass, config_entry, changed_fingerprint),
+            "victron rescan",
+        )
 
     return True
 
@@ -57,11 +91,15 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     if unload_ok := await hass.config_entries.async_unload_platforms(
         config_entry, PLATFORMS
     ):
-        hass.data[DOMAIN].pop(config_entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(config_entry.entry_id)
+        coordinator.close()
 
     return unload_ok
 
 
 async def update_listener(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
     """Update listener."""
+    coordinator = hass.data[DOMAIN].get(config_entry.entry_id)
+    if coordinator is not None and not coordinator.needs_reload(config_entry):
+        return
     await hass.config_entries.async_reload(config_entry.entry_id)
@@ -1,10 +1,16 @@
-"""Module defines entity descriptions for Victron components."""
+"""Module defines entity descriptions and base entities for Victron components."""
 
 from collections.abc import Callable
 from dataclasses import dataclass
 
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import EntityDescription
 from homeassistant.helpers.typing import StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import SIGNAL_NEW_REGISTER_SETS
 
 
 @dataclass
@@ -25,3 +31,53 @@ class VictronWriteBaseEntityDescription(VictronBaseEntityDescription):
     """An extension of VictronBaseEntityDescription for writeable Victron components."""
 
     address: int = None
+
+
+class VictronEntity:
+    """Direct access to the data of a Victron entity in the coordinator."""
+
+    data_key: str
+
+    def init_data_access(self, coordinator, description) -> None:
+        """Precompute the data key and resolve the slot of the entity in the store."""
+        self.data_key = f"{description.slave}.{description.key}"
+        store = coordinator.store
+        self._slot = store.index[self.data_key]
+        # the store only appends to these arrays, so the slot stays valid
+        self._values = store.values
+        self._availability = store.available
+
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        return self._availability[self._slot] == 1
+
+    @property
+    def value(self):
+        """Return the current value of the entity."""
+        return self._values[self._slot]
+
+
+class VictronCoordinatorEntity(VictronEntity, CoordinatorEntity):
+    """A coordinator entity that only writes its state when its data changed."""
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state if the value or availability of the entity changed."""
+        if self.coordinator.key_changed(self.data_key):
+            super()._handle_coordinator_update()
+
+
+def async_listen_new_register_sets(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    add_register_sets: Callable[[dict], None],
+) -> None:
+    """Call add_register_sets with the register sets found after setup."""
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_NEW_REGISTER_SETS.format(config_entry.entry_id),
+            add_register_sets,
+        )
+    )
@@ -12,13 +12,17 @@ from homeassistant.components.binary_sensor import (
     BinarySensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HassJob, HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import HassJob, HomeAssistant, callback
 from homeassistant.helpers import entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .base import VictronBaseEntityDescription
-from .const import DOMAIN, BoolReadEntityType, register_info_dict
+from .base import (
+    VictronBaseEntityDescription,
+    VictronCoordinatorEntity,
+    async_listen_new_register_sets,
+)
+from .const import DOMAIN
 from .coordinator import victronEnergyDeviceUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -36,34 +40,33 @@ async def async_setup_entry(
     ]
     _LOGGER.debug(victron_coordinator.processed_data()["register_set"])
     _LOGGER.debug(victron_coordinator.processed_data()["data"])
-    descriptions = []
-    # TODO cleanup
-    register_set = victron_coordinator.processed_data()["register_set"]
-    for slave, registerLedger in register_set.items():
-        for name in registerLedger:
-            for register_name, registerInfo in register_info_dict[name].items():
-                _LOGGER.debug(
-                    "unit == %s registerLedger == %s registerInfo",
-                    slave,
-                    registerLedger,
-                )
-
-                if isinstance(registerInfo.entityType, BoolReadEntityType):
-                    description = VictronEntityDescription(
-                        key=register_name,
-                        name=register_name.replace("_", " "),
-                        slave=slave,
-                    )
-                    _LOGGER.debug("composed description == %s", description)
-                    descriptions.append(description)
-
-    entities = []
-    entity = {}
-    for description in descriptions:
-        entity = description
-        entities.append(VictronBinarySensor(victron_coordinator, entity))
-
-    async_add_entities(entities, True)
+
+    @callback
+    def async_add_register_sets(
+        register_set: dict, update_before_add: bool = False
+    ) -> None:
+        """Add the entities of the given register sets."""
+        descriptions = []
+        for entry in victron_coordinator.entity_catalog.entries(
+            Platform.BINARY_SENSOR, register_set
+        ):
+            description = VictronEntityDescription(
+                key=entry.key,
+                name=entry.key.replace("_", " "),
+                slave=entry.unit,
+            )
+            descriptions.append(description)
+
+        entities = []
+        entity = {}
+        for description in descriptions:
+            entity = description
+            entities.append(VictronBinarySensor(victron_coordinator, entity))
+
+        async_add_entities(entities, update_before_add)
+
+    async_add_register_sets(victron_coordinator.processed_data()["register_set"], True)
+    async_listen_new_register_sets(hass, config_entry, async_add_register_sets)
 
 
 @dataclass
@@ -73,7 +76,7 @@ class VictronEntityDescription(
     """Describes victron sensor entity."""
 
 
-class VictronBinarySensor(CoordinatorEntity, BinarySensorEntity):
+class VictronBinarySensor(VictronCoordinatorEntity, BinarySensorEntity):
     """A binary sensor implementation for Victron energy device."""
 
     def __init__(
@@ -86,6 +89,7 @@ class VictronBinarySensor(CoordinatorEntity, BinarySensorEntity):
         # this needs to be changed to allow multiple of the same type
         self._attr_device_class = description.device_class
         self._attr_name = f"{description.name}"
+        self.init_data_access(coordinator, description)
 
         self._attr_unique_id = f"{self.description.slave}_{self.description.key}"
         if self.description.slave not in (100, 225):
@@ -101,19 +105,9 @@ class VictronBinarySensor(CoordinatorEntity, BinarySensorEntity):
     @property
     def is_on(self) -> bool:
         """Return True if the binary sensor is on."""
-        data = self.description.value_fn(
-            self.coordinator.processed_data(),
-            self.description.slave,
-            self.description.key,
-        )
+        data = self.value
         return cast("bool", data)
 
-    @property
-    def available(self) -> bool:
-        """Return True if entity is available."""
-        full_key = str(self.description.slave) + "." + self.description.key
-        return self.coordinator.processed_data()["availability"][full_key]
-
     @property
     def device_info(self) -> entity.DeviceInfo:
         """Return the device info."""
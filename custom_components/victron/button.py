@@ -12,13 +12,17 @@ from homeassistant.components.button import (
     ButtonEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HassJob, HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import HassJob, HomeAssistant, callback
 from homeassistant.helpers import entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .base import VictronWriteBaseEntityDescription
-from .const import CONF_ADVANCED_OPTIONS, DOMAIN, ButtonWriteType, register_info_dict
+from .base import (
+    VictronCoordinatorEntity,
+    VictronWriteBaseEntityDescription,
+    async_listen_new_register_sets,
+)
+from .const import DOMAIN
 from .coordinator import victronEnergyDeviceUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -34,38 +38,35 @@ async def async_setup_entry(
     victron_coordinator: victronEnergyDeviceUpdateCoordinator = hass.data[DOMAIN][
         config_entry.entry_id
     ]
-    descriptions = []
-    # TODO cleanup
-    register_set = victron_coordinator.processed_data()["register_set"]
-    for slave, registerLedger in register_set.items():
-        for name in registerLedger:
-            for register_name, registerInfo in register_info_dict[name].items():
-                _LOGGER.debug(
-                    "unit == %s registerLedger == %s registerInfo",
-                    slave,
-                    registerLedger,
-                )
-                if not config_entry.options[CONF_ADVANCED_OPTIONS]:
-                    continue
-
-                if isinstance(registerInfo.entityType, ButtonWriteType):
-                    description = VictronEntityDescription(
-                        key=register_name,
-                        name=register_name.replace("_", " "),
-                        slave=slave,
-                        device_class=ButtonDeviceClass.RESTART,
-                        address=registerInfo.register,
-                    )
-                    _LOGGER.debug("composed description == %s", description)
-                    descriptions.append(description)
-
-    entities = []
-    entity = {}
-    for description in descriptions:
-        entity = description
-        entities.append(VictronBinarySensor(victron_coordinator, entity))
-
-    async_add_entities(entities, True)
+
+    @callback
+    def async_add_register_sets(
+        register_set: dict, update_before_add: bool = False
+    ) -> None:
+        """Add the entities of the given register sets."""
+        descriptions = []
+        for entry in victron_coordinator.entity_catalog.entries(
+            Platform.BUTTON, register_set
+        ):
+            description = VictronEntityDescription(
+                key=entry.key,
+                name=entry.key.replace("_", " "),
+                slave=entry.unit,
+                device_class=ButtonDeviceClass.RESTART,
+                address=entry.register_info.register,
+            )
+            descriptions.append(description)
+
+        entities = []
+        entity = {}
+        for description in descriptions:
+            entity = description
+            entities.append(VictronBinarySensor(victron_coordinator, entity))
+
+        async_add_entities(entities, update_before_add)
+
+    async_add_register_sets(victron_coordinator.processed_data()["register_set"], True)
+    async_listen_new_register_sets(hass, config_entry, async_add_register_sets)
 
 
 @dataclass
@@ -75,7 +76,7 @@ class VictronEntityDescription(
     """Describes victron sensor entity."""
 
 
-class VictronBinarySensor(CoordinatorEntity, ButtonEntity):
+class VictronBinarySensor(VictronCoordinatorEntity, ButtonEntity):
     """A button implementation for Victron energy device."""
 
     def __init__(
@@ -87,6 +88,7 @@ class VictronBinarySensor(CoordinatorEntity, ButtonEntity):
         self.description: VictronEntityDescription = description
         self._attr_device_class = description.device_class
         self._attr_name = f"{description.name}"
+        self.init_data_access(coordinator, description)
 
         self._attr_unique_id = f"{self.description.slave}_{self.description.key}"
         if self.description.slave not in (100, 225):
@@ -101,16 +103,10 @@ class VictronBinarySensor(CoordinatorEntity, ButtonEntity):
 
     async def async_press(self) -> None:
         """Handle the button press."""
-        self.coordinator.write_register(
+        await self.coordinator.async_write_register(
             unit=self.description.slave, address=self.description.address, value=1
         )
 
-    @property
-    def available(self) -> bool:
-        """Return True if entity available."""
-        full_key = str(self.description.slave) + "." + self.description.key
-        return self.coordinator.processed_data()["availability"][full_key]
-
     @property
     def device_info(self) -> entity.DeviceInfo:
         """Return the device info."""
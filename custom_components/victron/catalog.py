@@ -0,0 +1,101 @@
+"""Catalog of the entities every platform creates for the register sets of an entry."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cache
+
+from homeassistant.const import Platform
+
+from .const import (
+    BoolReadEntityType,
+    ButtonWriteType,
+    ReadEntityType,
+    RegisterInfo,
+    SelectWriteType,
+    SliderWriteType,
+    SwitchWriteType,
+    register_info_dict,
+)
+
+# platform of the write entities, these are only created with advanced options
+WRITE_PLATFORMS = {
+    SwitchWriteType: Platform.SWITCH,
+    SliderWriteType: Platform.NUMBER,
+    SelectWriteType: Platform.SELECT,
+    ButtonWriteType: Platform.BUTTON,
+}
+
+
+@dataclass(slots=True)
+class CatalogEntry:
+    """A register that becomes an entity of a platform."""
+
+    unit: int | str
+    key: str
+    register_info: RegisterInfo
+    platform: Platform
+
+
+def entity_platforms(registerInfo: RegisterInfo, advanced: bool) -> list[Platform]:
+    """Return the platforms that create an entity for a register."""
+    entityType = registerInfo.entityType
+    platforms = []
+    if not advanced or (
+        isinstance(entityType, ReadEntityType)
+        and not isinstance(entityType, BoolReadEntityType)
+    ):
+        # without advanced options every register is reported as a sensor
+        platforms.append(Platform.SENSOR)
+    if isinstance(entityType, BoolReadEntityType):
+        platforms.append(Platform.BINARY_SENSOR)
+    if advanced and type(entityType) in WRITE_PLATFORMS:
+        platforms.append(WRITE_PLATFORMS[type(entityType)])
+    return platforms
+
+
+@cache
+def register_set_platforms(
+    name: str, advanced: bool
+) -> dict[Platform, tuple[tuple[str, RegisterInfo], ...]]:
+    """Return the (key, register info) of a register set for every platform."""
+    platforms: dict[Platform, list[tuple[str, RegisterInfo]]] = {}
+    for key, registerInfo in register_info_dict[name].items():
+        for platform in entity_platforms(registerInfo, advanced):
+            platforms.setdefault(platform, []).append((key, registerInfo))
+    return {platform: tuple(registers) for platform, registers in platforms.items()}
+
+
+class VictronEntityCatalog:
+    """Entities of the register sets of a config entry, partitioned by platform.
+
+    Each (unit, register set) is cataloged once, the first time any platform
+    asks for it, for all platforms at the same time. The other platforms,
+    and the setup of register sets found later, only look up their slice.
+    """
+
+    def __init__(self, advanced: bool) -> None:
+        """Initialize the catalog."""
+        self.advanced = advanced
+        self._slices: dict[
+            tuple[int | str, str], dict[Platform, list[CatalogEntry]]
+        ] = {}
+
+    def entries(self, platform: Platform, register_set: dict) -> list[CatalogEntry]:
+        """Return the entries of a platform for a {unit: [register set names]} mapping."""
+        entries = []
+        for unit, names in register_set.items():
+            for name in names:
+                slices = self._slices.get((unit, name))
+                if slices is None:
+                    slices = self._slices[(unit, name)] = {
+                        platform: [
+                            CatalogEntry(unit, key, registerInfo, platform)
+                            for key, registerInfo in registers
+                        ]
+                        for platform, registers in register_set_platforms(
+                            name, self.advanced
+                        ).items()
+                    }
+                entries.extend(slices.get(platform, ()))
+        return entries
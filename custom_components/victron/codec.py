@@ -0,0 +1,60 @@
+"""Decode register words into values for every data type of the register ledger."""
+
+from __future__ import annotations
+
+from functools import cache
+import struct
+
+from .const import INT16, INT32, INT64, STRING, UINT16, UINT32, UINT64
+
+# struct format of each numeric data type, big endian on the wire
+STRUCT_FORMATS = {
+    UINT16: "H",
+    INT16: "h",
+    UINT32: "I",
+    INT32: "i",
+    UINT64: "Q",
+    INT64: "q",
+}
+
+WORD_COUNTS = {
+    UINT16: 1,
+    INT16: 1,
+    UINT32: 2,
+    INT32: 2,
+    UINT64: 4,
+    INT64: 4,
+}
+
+SIGNED_TYPES = frozenset({INT16, INT32, INT64})
+
+
+def word_count(dataType) -> int:
+    """Return the number of 16 bit registers used by a data type."""
+    if isinstance(dataType, STRING):
+        return dataType.length
+    return WORD_COUNTS[dataType]
+
+
+@cache
+def _words_struct(count: int) -> struct.Struct:
+    return struct.Struct(f">{count}H")
+
+
+def decode_number(words, dataType) -> int:
+    """Decode the words of a numeric register, most significant word first."""
+    count = WORD_COUNTS[dataType]
+    if len(words) < count:
+        raise ValueError(f"{dataType} needs {count} registers, got {len(words)}")
+    value = 0
+    for word in words[:count]:
+        value = (value << 16) | word
+    if dataType in SIGNED_TYPES and value >> (count * 16 - 1):
+        value -= 1 << (count * 16)
+    return value
+
+
+def decode_string(words, string_encoding: str = "ascii") -> str:
+    """Decode the words of a string register up to its first NUL character."""
+    raw = _words_struct(len(words)).pack(*words)
+    return raw.split(b"\x00", 1)[0].decode(string_encoding, "replace")
@@ -23,25 +23,41 @@ from .const import (
     CONF_AC_CURRENT_LIMIT,
     CONF_AC_SYSTEM_VOLTAGE,
     CONF_ADVANCED_OPTIONS,
+    CONF_CONNECTIONS,
     CONF_DC_CURRENT_LIMIT,
     CONF_DC_SYSTEM_VOLTAGE,
     CONF_HOST,
     CONF_INTERVAL,
+    CONF_MAX_IN_FLIGHT,
     CONF_NUMBER_OF_PHASES,
+    CONF_PIPELINE_DEPTH,
+    CONF_POLL_TIERS,
     CONF_PORT,
     CONF_USE_SLIDERS,
+    CONF_WRITE_WINDOW,
     DC_VOLTAGES,
+    DEFAULT_WRITE_WINDOW,
+    DISCOVERY_FINGERPRINT,
     DOMAIN,
     PHASE_CONFIGURATIONS,
+    POLL_CONNECTIONS,
+    POLL_MAX_IN_FLIGHT,
+    POLL_PIPELINE_DEPTH,
     SCAN_REGISTERS,
+    PollTier,
     RegisterInfo,
+    register_info_dict,
 )
+from .fingerprint import async_discover
 from .hub import VictronHub
 
 _LOGGER = logging.getLogger(__name__)
 
 CONF_RESCAN = "rescan"
 
+POLL_TIER_REGISTER_SET = vol.In(list(register_info_dict), msg="unknown register set")
+POLL_TIER = vol.In([tier.value for tier in PollTier])
+
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_HOST): str,
@@ -52,7 +68,9 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 )
 
 
-async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
+async def validate_input(
+    hass: HomeAssistant, data: dict[str, Any], *, use_cache: bool = True
+) -> dict[str, Any]:
     """Validate the user input allows us to connect.
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
@@ -72,16 +90,62 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     try:
         hub.connect()
         _LOGGER.debug("connection was succesfull")
-        discovered_devices = await scan_connected_devices(hub=hub)
+        discovered_devices, fingerprint = await scan_connected_devices(
+            hass=hass, hub=hub, use_cache=use_cache
+        )
         _LOGGER.debug("successfully discovered devices")
     except HomeAssistantError:
         _LOGGER.error("Failed to connect to the victron device:")
-    return {"title": DOMAIN, "data": discovered_devices}
+    return {"title": DOMAIN, "data": discovered_devices, "fingerprint": fingerprint}
+
+
+async def scan_connected_devices(
+    hass: HomeAssistant, hub: VictronHub, *, use_cache: bool = True
+) -> tuple[dict, dict | None]:
+    """Scan for connected devices, reusing the cached scan of an unchanged GX."""
+    return await async_discover(hass, hub, use_cache=use_cache)
+
+
+def parse_poll_tiers(text: str) -> dict[str, str]:
+    """Parse comma separated ``register_set=tier`` pairs, skipping invalid ones."""
+    tiers = {}
+    for pair in text.split(","):
+        if not pair.strip():
+            continue
+        name, _, tier = (part.strip() for part in pair.partition("="))
+        try:
+            name = POLL_TIER_REGISTER_SET(name)
+            tiers[name] = POLL_TIER(tier)
+        except vol.Invalid as e:
+            _LOGGER.warning("Ignoring poll tier override %s: %s", pair.strip(), e)
+    return tiers
+
+
+def connection_schema(options: dict) -> dict:
+    """Return the options of the connections used to poll the GX device."""
+    return {
+        vol.Optional(
+            CONF_CONNECTIONS, default=options.get(CONF_CONNECTIONS, POLL_CONNECTIONS)
+        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=8)),
+        vol.Optional(
+            CONF_MAX_IN_FLIGHT,
+            default=options.get(CONF_MAX_IN_FLIGHT, POLL_MAX_IN_FLIGHT),
+        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+        vol.Optional(
+            CONF_PIPELINE_DEPTH,
+            default=options.get(CONF_PIPELINE_DEPTH, POLL_PIPELINE_DEPTH),
+        ): vol.All(vol.Coerce(int), vol.Range(min=0, max=16)),
+    }
 
 
-async def scan_connected_devices(hub: VictronHub) -> list:
-    """Scan for connected devices."""
-    return hub.determine_present_devices()
+def format_poll_tiers(tiers: dict[str, str] | None) -> str:
+    """Format poll tier overrides the way parse_poll_tiers reads them."""
+    return ", ".join(f"{name}={tier}" for name, tier in (tiers or {}).items())
+
+
+def entry_data(info: dict[str, Any]) -> dict[str, Any]:
+    """Return the config entry data for the result of validate_input."""
+    return {SCAN_REGISTERS: info["data"], DISCOVERY_FINGERPRINT: info["fingerprint"]}
 
 
 class VictronFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -149,7 +213,7 @@ class VictronFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             options = user_input
             return self.async_create_entry(
                 title=info["title"],
-                data={SCAN_REGISTERS: info["data"]},
+                data=entry_data(info),
                 options=options,
             )
 
@@ -189,7 +253,7 @@ class VictronFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 _LOGGER.debug("setting up extra entry")
                 return self.async_create_entry(
                     title=info["title"],
-                    data={SCAN_REGISTERS: info["data"]},
+                    data=entry_data(info),
                     options=options,
                 )
 
@@ -315,12 +379,14 @@ class VictronOptionFlowHandler(config_entries.OptionsFlow):
         config = dict(self.config_entry.options)
         # combine dictionaries with priority given to user_input
         if user_input[CONF_RESCAN]:
-            info = await validate_input(self.hass, config)
+            info = await validate_input(self.hass, config, use_cache=False)
             self.hass.config_entries.async_update_entry(
-                self.config_entry, data={SCAN_REGISTERS: info["data"]}, title=""
+                self.config_entry, data=entry_data(info), title=""
             )
 
         user_input.pop(CONF_RESCAN, None)
+        if CONF_POLL_TIERS in user_input:
+            user_input[CONF_POLL_TIERS] = parse_poll_tiers(user_input[CONF_POLL_TIERS])
         dict_priority = {1: user_input, 2: config}
         combined_config = {**dict_priority[2], **dict_priority[1]}
 
@@ -339,12 +405,14 @@ class VictronOptionFlowHandler(config_entries.OptionsFlow):
         config = dict(self.config_entry.options)
         # remove temp options =
         if user_input[CONF_RESCAN]:
-            info = await validate_input(self.hass, config)
+            info = await validate_input(self.hass, config, use_cache=False)
             self.hass.config_entries.async_update_entry(
-                self.config_entry, data={SCAN_REGISTERS: info["data"]}, title=""
+                self.config_entry, data=entry_data(info), title=""
             )
 
         user_input.pop(CONF_RESCAN, None)
+        if CONF_POLL_TIERS in user_input:
+            user_input[CONF_POLL_TIERS] = parse_poll_tiers(user_input[CONF_POLL_TIERS])
         # combine dictionaries with priority given to user_input
         dict_priority = {1: user_input, 2: config}
         combined_config = {**dict_priority[2], **dict_priority[1]}
@@ -374,7 +442,9 @@ class VictronOptionFlowHandler(config_entries.OptionsFlow):
 
             try:
                 if user_input[CONF_RESCAN]:
-                    info = await validate_input(self.hass, self.config_entry.options)
+                    info = await validate_input(
+                        self.hass, self.config_entry.options, use_cache=False
+                    )
                     # config[SCAN_REGISTERS] = info["data"]
                     _LOGGER.debug(info)
             except CannotConnect:
@@ -387,7 +457,7 @@ class VictronOptionFlowHandler(config_entries.OptionsFlow):
 
             if user_input[CONF_RESCAN]:
                 self.hass.config_entries.async_update_entry(
-                    self.config_entry, data={SCAN_REGISTERS: info["data"]}, title=""
+                    self.config_entry, data=entry_data(info), title=""
                 )
             # return self.async_create_entry(title="", data={})
 
@@ -411,6 +481,13 @@ class VictronOptionFlowHandler(config_entries.OptionsFlow):
                     vol.Required(
                         CONF_INTERVAL, default=self.config_entry.options[CONF_INTERVAL]
                     ): vol.All(vol.Coerce(int)),
+                    vol.Optional(
+                        CONF_POLL_TIERS,
+                        default=format_poll_tiers(
+                            self.config_entry.options.get(CONF_POLL_TIERS)
+                        ),
+                    ): str,
+                    **connection_schema(self.config_entry.options),
                     vol.Optional(CONF_RESCAN, default=False): bool,
                     vol.Optional(CONF_ADVANCED_OPTIONS, default=False): bool,
                 },
@@ -492,6 +569,15 @@ class VictronOptionFlowHandler(config_entries.OptionsFlow):
                             CONF_USE_SLIDERS, config.get(CONF_USE_SLIDERS, True)
                         ),
                     ): bool,
+                    vol.Optional(
+                        CONF_WRITE_WINDOW,
+                        default=config.get(CONF_WRITE_WINDOW, DEFAULT_WRITE_WINDOW),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                    vol.Optional(
+                        CONF_POLL_TIERS,
+                        default=format_poll_tiers(config.get(CONF_POLL_TIERS)),
+                    ): str,
+                    **connection_schema(config),
                     vol.Optional(CONF_RESCAN, default=False): bool,
                     vol.Optional(CONF_ADVANCED_OPTIONS, default=True): bool,
                 },
@@ -1,6 +1,8 @@
 """Constants for the victron integration."""
 
 from enum import Enum
+from functools import cache
+from types import MappingProxyType
 
 from homeassistant.components.sensor import SensorStateClass
 from homeassistant.const import (
@@ -39,6 +41,7 @@ DOMAIN = "victron"
 CONF_HOST = "host"
 CONF_PORT = "port"
 SCAN_REGISTERS = "registers"
+DISCOVERY_FINGERPRINT = "fingerprint"
 CONF_INTERVAL = "interval"
 CONF_ADVANCED_OPTIONS = "advanced"
 CONF_AC_CURRENT_LIMIT = "ac_current"
@@ -47,6 +50,99 @@ CONF_DC_SYSTEM_VOLTAGE = "dc_voltage"
 CONF_AC_SYSTEM_VOLTAGE = "ac_voltage"
 CONF_NUMBER_OF_PHASES = "number_of_phases"
 CONF_USE_SLIDERS = "use_sliders"
+CONF_POLL_TIERS = "poll_tiers"
+CONF_WRITE_WINDOW = "write_window"
+CONF_CONNECTIONS = "connections"
+CONF_MAX_IN_FLIGHT = "max_in_flight"
+CONF_PIPELINE_DEPTH = "pipeline_depth"
+
+DEFAULT_WRITE_WINDOW = 0.5  # seconds
+
+DISCOVERY_CONNECTIONS = 2
+DISCOVERY_MAX_IN_FLIGHT = 2
+DISCOVERY_TIMEOUT = 300  # seconds
+POLL_CONNECTIONS = 2
+POLL_MAX_IN_FLIGHT = 2
+# requests kept in flight per connection, 0 or 1 waits for every response
+POLL_PIPELINE_DEPTH = 0
+HOTPLUG_SWEEP_BUDGET = 0.05  # seconds of bus time per update
+
+SIGNAL_NEW_REGISTER_SETS = f"{DOMAIN}_new_register_sets_{{}}"
+
+
+class PollTier(Enum):
+    """Polling cadence of a register set."""
+
+    FAST = "fast"
+    NORMAL = "normal"
+    SLOW = "slow"
+    ONCE = "once"
+
+
+# Number of coordinator updates between two reads of a register set (0 = read once)
+POLL_TIER_CYCLES = {
+    PollTier.FAST: 1,
+    PollTier.NORMAL: 3,
+    PollTier.SLOW: 12,
+    PollTier.ONCE: 0,
+}
+# Register sets holding any of these units follow fast changing measurements
+FAST_POLL_UNITS = (
+    UnitOfPower.WATT,
+    UnitOfPower.KILO_WATT,
+    UnitOfElectricCurrent.AMPERE,
+    UnitOfElectricPotential.VOLT,
+    UnitOfFrequency.HERTZ,
+)
+# Measurements in these units flicker in their last digit, by default a change of
+# a single step (1 / scale) is not reported
+DEADBAND_UNITS = (
+    UnitOfPower.WATT,
+    UnitOfElectricCurrent.AMPERE,
+    UnitOfElectricPotential.VOLT,
+)
+# Register sets that hold static data or configuration
+SLOW_POLL_REGISTER_SETS = ("system_firmware_registers", "battery_info_registers")
+
+MODBUS_MAX_READ_COUNT = 125  # Max registers in a single read holding registers PDU
+# Register sets up to this many registers apart are merged into one read. A
+# merged read never spans a reserved register, and one that the GX rejects
+# anyway is split up again for that unit by the coordinator.
+READ_PLAN_MAX_GAP = 10
+# Registers documented as reserved that a merged read must never cover
+INVALID_REGISTERS = frozenset(
+    {
+        212,
+        *range(223, 230),
+        867,
+        *range(3225, 3228),
+        *range(3704, 3708),
+        *range(4616, 4620),
+        *range(4926, 4930),
+        *range(4932, 4940),
+        5217,
+    }
+)
+# Modbus exception codes the GX answers for unit ids without a device
+# (gateway path unavailable, gateway target device failed to respond)
+GATEWAY_EXCEPTION_CODES = frozenset({0x0A, 0x0B})
+# Device classes served by the same unit, discovery probes the sets of both
+# once the anchor set of either is found (unit 100 serves system and settings)
+SHARED_UNIT_FAMILIES = {
+    "system": ("settings",),
+    "settings": ("system",),
+}
+
+
+class ProbeResult(Enum):
+    """Outcome of probing a register set on a unit."""
+
+    PRESENT = "present"
+    # the unit answered, but does not serve the registers
+    MISSING = "missing"
+    # there is no device behind the unit id
+    UNIT_ABSENT = "unit_absent"
+
 
 AC_VOLTAGES = {
     "US (120)": 120,
@@ -80,6 +176,23 @@ UINT64 = "uint64"
 UINT16_MAX = 65535
 
 
+@cache
+def enum_labels(decodeEnum: type[Enum], merge_duplicates: bool = True):
+    """Return the read only value to label table of an enum.
+
+    Names of members that only exist because the GX reports the same state
+    under several values end in ``_DUPLICATE_<n>``; with ``merge_duplicates``
+    they are reported by the name of the original state.
+    """
+    labels = {}
+    for member in decodeEnum:
+        label = member.name
+        if merge_duplicates:
+            label = label.split("_DUPLICATE")[0]
+        labels[member.value] = label
+    return MappingProxyType(labels)
+
+
 class EntityType:
     """Base entityType."""
 
@@ -103,6 +216,7 @@ class TextReadEntityType(ReadEntityType):
         """Initialize the text read entity type."""
         super().__init__()
         self.decodeEnum = decodeEnum
+        self.labels = enum_labels(decodeEnum)
 
 
 class BoolReadEntityType(ReadEntityType):
@@ -146,6 +260,17 @@ class SelectWriteType(EntityType):
         """Initialize the select write type."""
         super().__init__(entityTypeName="select")
         self.options = optionsEnum
+        # options have to stay distinct to be selectable, so keep duplicates apart
+        self.labels = enum_labels(optionsEnum, merge_duplicates=False)
+
+
+@cache
+def _unit_stateclass(unit):
+    if unit == UnitOfEnergy.KILO_WATT_HOUR:
+        return SensorStateClass.TOTAL_INCREASING
+    if unit is None:
+        return None
+    return SensorStateClass.MEASUREMENT
 
 
 class RegisterInfo:
@@ -159,6 +284,8 @@ class RegisterInfo:
         scale=1,
         entityType: EntityType = ReadEntityType(),
         step=0,
+        *,
+        deadband=None,
     ) -> None:
         """Initialize the register info."""
         self.register = register
@@ -173,14 +300,20 @@ class RegisterInfo:
         self.step = step
         # Only used for writeable entities
         self.entityType = entityType
+        if deadband is None:
+            # written values have to show up as soon as they are read back
+            deadband = (
+                1 / scale
+                if self.unit in DEADBAND_UNITS and type(entityType) is ReadEntityType
+                else 0
+            )
+        # Changes of the decoded value up to this amount are not reported
+        self.deadband = deadband
+        self._stateclass = _unit_stateclass(self.unit)
 
     def determine_stateclass(self):
         """Determine the state class."""
-        if self.unit == UnitOfEnergy.KILO_WATT_HOUR:
-            return SensorStateClass.TOTAL_INCREASING
-        if self.unit is None:
-            return None
-        return SensorStateClass.MEASUREMENT
+        return self._stateclass
 
 
 class generic_alarm_ledger(Enum):
@@ -3144,7 +3277,7 @@ acsystem_registers = {
     "acsystem_disable_feed_in": RegisterInfo(
         4924, UINT16, entityType=SwitchWriteType()
     ),
-    # RESERVED 4925 - 4929
+    # RESERVED 4926 - 4929
 }
 
 acsystem_registers_1 = {
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
 from collections import OrderedDict
 from datetime import timedelta
+from itertools import cycle
 import logging
+import math
 
 import pymodbus
+from pymodbus.exceptions import ModbusException
 
 if "3.7.0" <= pymodbus.__version__ <= "3.7.4":
     from pymodbus.pdu.register_read_message import ReadHoldingRegistersResponse
@@ -15,21 +19,35 @@ else:
 
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .catalog import VictronEntityCatalog
 from .const import (
+    DEFAULT_WRITE_WINDOW,
+    DISCOVERY_FINGERPRINT,
     DOMAIN,
-    INT16,
-    INT32,
-    INT64,
-    STRING,
-    UINT16,
-    UINT32,
-    UINT64,
-    RegisterInfo,
+    HOTPLUG_SWEEP_BUDGET,
+    POLL_CONNECTIONS,
+    POLL_MAX_IN_FLIGHT,
+    POLL_PIPELINE_DEPTH,
+    POLL_TIER_CYCLES,
+    SCAN_REGISTERS,
+    SIGNAL_NEW_REGISTER_SETS,
+    ProbeResult,
     register_info_dict,
 )
-from .hub import VictronHub
+from .decoder import decode_plan, pack_registers
+from .hub import VictronAsyncHub, VictronHub, classify_response
+from .planner import (
+    ReadBlock,
+    determine_poll_tier,
+    plan_reads,
+    plan_single_read,
+    sentinel_read,
+)
+from .store import VictronValueStore
+from .writer import VictronWriteCoalescer, VictronWriteQueue
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,7 +55,7 @@ _LOGGER = logging.getLogger(__name__)
 class victronEnergyDeviceUpdateCoordinator(DataUpdateCoordinator):
     """Gather data for the energy device."""
 
-    api: VictronHub
+    api: VictronAsyncHub | VictronHub
 
     def __init__(
         self,
@@ -46,16 +64,58 @@ class victronEnergyDeviceUpdateCoordinator(DataUpdateCoordinator):
         port: str,
         decodeInfo: OrderedDict,
         interval: int,
+        *,
+        use_async: bool = True,
+        poll_tiers: dict[str, str] | None = None,
+        write_window: float = DEFAULT_WRITE_WINDOW,
+        hotplug_budget: float = HOTPLUG_SWEEP_BUDGET,
+        connections: int = POLL_CONNECTIONS,
+        max_in_flight: int = POLL_MAX_IN_FLIGHT,
+        pipeline_depth: int = POLL_PIPELINE_DEPTH,
+        advanced_options: bool = False,
     ) -> None:
         """Initialize Update Coordinator."""
 
         super().__init__(
             hass, _LOGGER, name=DOMAIN, update_interval=timedelta(seconds=interval)
         )
-        self.api = VictronHub(host, port)
-        self.api.connect()
-        self.decodeInfo = decodeInfo
+        if use_async:
+            self.api = VictronAsyncHub(
+                host, port, connections, max_in_flight, pipeline_depth
+            )
+        else:
+            # Fallback to the executor wrapped sync client
+            self.api = VictronHub(host, port)
+            self.api.connect()
+        # copied, register sets found by the hot-plug sweep are added to it
+        self.decodeInfo = {unit: list(names) for unit, names in decodeInfo.items()}
         self.interval = interval
+        self.read_plans: dict[tuple[int, tuple[str, ...]], list[ReadBlock]] = {}
+        self.poll_cycles = {
+            name: POLL_TIER_CYCLES[determine_poll_tier(name, poll_tiers)]
+            for name in register_info_dict
+        }
+        self.store = VictronValueStore(decodeInfo)
+        self._update_count = 0
+        # keys whose value or availability changed during the last update,
+        # None until the first update completed (everything is new)
+        self.changed_keys: set[str] | None = None
+        # False while the changes of a failed update have not been announced
+        self._changes_announced = True
+        # update count at which a (unit, register set) has to be read again
+        self._next_read: dict[tuple[int, str], float] = {}
+        # words of every (unit, register set) as last decoded into the store
+        self._raw_words: dict[tuple[int, str], bytes] = {}
+        self.write_queue = VictronWriteQueue(self.send_write)
+        self.write_coalescer = VictronWriteCoalescer(self.write_queue, write_window)
+        self.hotplug_budget = hotplug_budget
+        self._sweep_probes = self.api.discovery_probes()
+        self._sweep = cycle(self._sweep_probes)
+        self._sweep_absent_unit = None
+        self.entity_catalog = VictronEntityCatalog(advanced_options)
+        self._entry_options = (
+            dict(self.config_entry.options) if self.config_entry else None
+        )
 
     # async def force_update_data(self) -> None:
     #     data = await self._async_update_data()
@@ -63,94 +123,253 @@ class victronEnergyDeviceUpdateCoordinator(DataUpdateCoordinator):
 
     async def _async_update_data(self) -> dict:
         """Fetch all device and sensor data from api."""
-        data = ""
         """Get the latest data from victron"""
         self.logger.debug("Fetching victron data")
         self.logger.debug(self.decodeInfo)
 
-        parsed_data = OrderedDict()
-        unavailable_entities = OrderedDict()
-
         if self.data is None:
-            self.data = {"data": OrderedDict(), "availability": OrderedDict()}
-
-        for unit, registerInfo in self.decodeInfo.items():
-            for name in registerInfo:
-                data = await self.fetch_registers(unit, register_info_dict[name])
-                # TODO safety check if result is actual data if not unavailable
-                if data.isError():
-                    # raise error
-                    # TODO change this to work with partial updates
-                    for key in register_info_dict[name]:
-                        full_key = str(unit) + "." + key
-                        # self.data["data"][full_key] = None
-                        unavailable_entities[full_key] = False
-
-                    _LOGGER.warning(
-                        "No valid data returned for entities of slave: %s (if the device continues to no longer update) check if the device was physically removed. Before opening an issue please force a rescan to attempt to resolve this issue",
+            self.data = {
+                "register_set": self.decodeInfo,
+                "data": self.store.data_view,
+                "availability": self.store.availability_view,
+            }
+
+        first_update = self._update_count == 0
+        if self._changes_announced:
+            self.changed_keys = set()
+        # decoded values are stored before a failing unit raises, listeners
+        # are only called once an update succeeds, so keep collecting until then
+        self._changes_announced = False
+
+        if isinstance(self.api, VictronAsyncHub) and not self.api.is_still_connected():
+            await self.api.connect()
+
+        cycle = self._update_count
+        self._update_count += 1
+        # units are read concurrently, the hub spreads them over its connections
+        results = await asyncio.gather(
+            *(
+                self.async_update_unit(unit, registerInfo, cycle)
+                for unit, registerInfo in list(self.decodeInfo.items())
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+        if self.hotplug_budget > 0:
+            await self.async_sweep()
+
+        if first_update:
+            self.changed_keys = None
+        self._changes_announced = True
+        return self.data
+
+    async def async_update_unit(self, unit, registerInfo, cycle: int) -> None:
+        """Read the register sets of a unit that are due in this update."""
+        due = tuple(
+            name
+            for name in registerInfo
+            if self._next_read.get((unit, name), 0) <= cycle
+        )
+        if not due:
+            return
+        blocks = self.read_plan(unit, due)
+        # requested together, a pipelined connection sends them back to back
+        responses = await asyncio.gather(
+            *(
+                self.fetch_registers(unit, block.address, block.count)
+                for block in blocks
+            )
+        )
+        for block, data in zip(list(blocks), responses, strict=True):
+            if data.isError() and len(block.register_sets) > 1:
+                # A merged read can fail while its sets are readable on their
+                # own (e.g. older firmware), so stop merging them for this unit
+                _LOGGER.debug(
+                    "merged read of %s failed for unit %s, splitting it up",
+                    [name for name, _ in block.register_sets],
+                    unit,
+                )
+                index = blocks.index(block)
+                blocks[index : index + 1] = block.split()
+                for single in block.split():
+                    success = self.process_block(
                         unit,
+                        single,
+                        await self.fetch_registers(unit, single.address, single.count),
                     )
-                else:
-                    parsed_data = OrderedDict(
-                        list(parsed_data.items())
-                        + list(
-                            self.parse_register_data(
-                                data, register_info_dict[name], unit
-                            ).items()
-                        )
-                    )
-                    for key in register_info_dict[name]:
-                        full_key = str(unit) + "." + key
-                        unavailable_entities[full_key] = True
+                    self.schedule_next_read(unit, single, cycle, success)
+                continue
+            success = self.process_block(unit, block, data)
+            self.schedule_next_read(unit, block, cycle, success)
 
+    def known_register_sets(self) -> set[tuple[int, str]]:
+        """Return the (unit, register set) pairs that are polled."""
         return {
-            "register_set": self.decodeInfo,
-            "data": parsed_data,
-            "availability": unavailable_entities,
+            (int(unit), name)
+            for unit, names in self.decodeInfo.items()
+            for name in names
         }
 
-    def parse_register_data(
-        self,
-        buffer: ReadHoldingRegistersResponse,
-        registerInfo: OrderedDict[str, RegisterInfo],
-        unit: int,
-    ) -> dict:
-        """Parse the register data using convert_from_registers."""
-        decoded_data = OrderedDict()
-        registers = buffer.registers
-        offset = 0
-
-        for key, value in registerInfo.items():
-            full_key = f"{unit}.{key}"
-            count = 0
-            if value.dataType in (INT16, UINT16):
-                count = 1
-            elif value.dataType in (INT32, UINT32):
-                count = 2
-            elif value.dataType in (INT64, UINT64):
-                count = 4
-            elif isinstance(value.dataType, STRING):
-                count = value.dataType.length
-            segment = registers[offset : offset + count]
-
-            if isinstance(value.dataType, STRING):
-                raw = self.api.convert_string_from_register(segment)
-                decoded_data[full_key] = raw
-            else:
-                raw = self.api.convert_number_from_register(segment, value.dataType)
-                # _LOGGER.warning("trying to decode %s with value %s", key, raw)
-                decoded_data[full_key] = self.decode_scaling(
-                    raw, value.scale, value.unit
+    async def async_sweep(self) -> None:
+        """Probe a few unknown (unit, register set) pairs for hot-plugged devices.
+
+        Probes continue where the previous update stopped until the bus time
+        budget of this update is spent, so the full discovery range is
+        covered slowly over many updates.
+        """
+        known = self.known_register_sets()
+        loop = self.hass.loop
+        deadline = loop.time() + self.hotplug_budget
+        found: dict[int, list[tuple[str, ReadHoldingRegistersResponse]]] = {}
+        for _ in range(len(self._sweep_probes)):
+            unit, name = next(self._sweep)
+            if unit == self._sweep_absent_unit:
+                continue
+            # probes are ordered by unit, so a different unit ends the skipping
+            self._sweep_absent_unit = None
+            if (unit, name) in known:
+                continue
+            block = plan_single_read(name)
+            try:
+                data = await self.fetch_registers(unit, *sentinel_read(name))
+                outcome = classify_response(data)
+                if outcome is ProbeResult.PRESENT:
+                    data = await self.fetch_registers(unit, block.address, block.count)
+            except UpdateFailed as e:
+                _LOGGER.debug(
+                    "hot-plug probe of %s on unit %s failed: %s", name, unit, e
                 )
-            offset += count
+                break
+            if outcome is ProbeResult.UNIT_ABSENT:
+                # skip the remaining register sets of this unit
+                self._sweep_absent_unit = unit
+            elif not data.isError() and len(data.registers) >= block.count:
+                found.setdefault(unit, []).append((name, data))
+            if loop.time() >= deadline:
+                break
+        if found:
+            self.add_register_sets(found)
+
+    def add_register_sets(
+        self, found: dict[int, list[tuple[str, ReadHoldingRegistersResponse]]]
+    ) -> None:
+        """Start polling newly found register sets and announce them to the platforms."""
+        added = {}
+        for unit, sets in found.items():
+            # units of a stored entry are strings
+            key = next((k for k in self.decodeInfo if int(k) == unit), unit)
+            names = [name for name, _ in sets]
+            _LOGGER.info("Found register sets %s on unit %s", names, unit)
+            self.decodeInfo.setdefault(key, []).extend(names)
+            self.store.add_register_sets(key, names)
+            for name, data in sets:
+                self.process_block(key, plan_single_read(name), data)
+                self._next_read[(key, name)] = self._update_count + max(
+                    self.poll_cycles[name], 1
+                )
+            added[key] = names
+
+        if self.config_entry is None:
+            return
+        async_dispatcher_send(
+            self.hass,
+            SIGNAL_NEW_REGISTER_SETS.format(self.config_entry.entry_id),
+            added,
+        )
+        # the fingerprint no longer covers the topology, the next start records
+        # a new one
+        self.hass.config_entries.async_update_entry(
+            self.config_entry,
+            data={
+                **self.config_entry.data,
+                SCAN_REGISTERS: {
+                    unit: list(names) for unit, names in self.decodeInfo.items()
+                },
+                DISCOVERY_FINGERPRINT: None,
+            },
+        )
 
-        return decoded_data
+    def needs_reload(self, config_entry) -> bool:
+        """Return True if an update of the config entry needs a reload.
 
-    def decode_scaling(self, number, scale, unit):
-        """Decode the scaling."""
-        if unit == "" and scale == 1:
-            return round(number)
-        return number / scale
+        Updates that only record register sets the coordinator already polls
+        (e.g. from the hot-plug sweep) do not.
+        """
+        if dict(config_entry.options) != self._entry_options:
+            return True
+        registers = config_entry.data[SCAN_REGISTERS]
+        return {
+            (int(unit), name) for unit, names in registers.items() for name in names
+        } != self.known_register_sets()
+
+    def key_changed(self, key: str) -> bool:
+        """Return True if the value or availability of key changed in the last update."""
+        return self.changed_keys is None or key in self.changed_keys
+
+    def read_plan(self, unit, names: tuple[str, ...]) -> list[ReadBlock]:
+        """Return the (cached) read blocks for a combination of register sets."""
+        plan = self.read_plans.get((unit, names))
+        if plan is None:
+            plan = self.read_plans[(unit, names)] = plan_reads(names)
+        return plan
+
+    def schedule_next_read(self, unit, block: ReadBlock, cycle: int, success: bool):
+        """Schedule when the register sets of a block have to be read again."""
+        for name, _ in block.register_sets:
+            if not success:
+                # retry on the next update
+                self._next_read[(unit, name)] = cycle + 1
+            elif self.poll_cycles[name] == 0:
+                self._next_read[(unit, name)] = math.inf
+            else:
+                self._next_read[(unit, name)] = cycle + self.poll_cycles[name]
+
+    def process_block(
+        self,
+        unit,
+        block: ReadBlock,
+        data: ReadHoldingRegistersResponse,
+        changed: set[str] | None = None,
+    ) -> bool:
+        """Decode the response of a read block into the store.
+
+        The keys whose value or availability changed are added to changed,
+        which defaults to the changed keys of the running update.
+        """
+        store = self.store
+        if changed is None:
+            changed = self.changed_keys
+        if data.isError() or len(data.registers) < block.count:
+            # raise error
+            # TODO change this to work with partial updates
+            for name, _ in block.register_sets:
+                store.set_available(store.slots(unit, name), False, changed)
+
+            _LOGGER.warning(
+                "No valid data returned for entities of slave: %s (if the device continues to no longer update) check if the device was physically removed. Before opening an issue please force a rescan to attempt to resolve this issue",
+                unit,
+            )
+            return False
+
+        buffer = pack_registers(data.registers)
+        raw_words = self._raw_words
+        for name, offset in block.register_sets:
+            slots = store.slots(unit, name)
+            plan = decode_plan(name, unit)
+            raw = plan.raw_words(buffer, offset)
+            previous = raw_words.get((unit, name))
+            # most words do not change between polls, only decode the ones that did
+            if previous is None:
+                plan.decode_into(raw, 0, store.values, slots, changed)
+            elif raw != previous:
+                plan.decode_changed_into(raw, previous, store.values, slots, changed)
+            raw_words[(unit, name)] = raw
+            store.set_available(slots, True, changed)
+            store.touch(slots)
+        return True
 
     def encode_scaling(self, value, unit, scale):
         """Encode the scaling."""
@@ -165,51 +384,100 @@ class victronEnergyDeviceUpdateCoordinator(DataUpdateCoordinator):
         return self.data
 
     async def async_update_local_entry(self, key, value):
-        """Update the local entry."""
-        data = self.data
-        data["data"][key] = value
-        self.async_set_updated_data(data)
-
-        await self.async_request_refresh()
+        """Update the local entry and verify it against the device."""
+        self.store.set_value(key, value)
+        # the local value no longer matches the last words read for its set
+        self._raw_words.pop(self.store.register_sets[key], None)
+        self.notify_changed({key})
+        await self.async_read_back(key)
+
+    async def async_read_back(self, key):
+        """Re-read the register set of key and notify the entities that changed.
+
+        Used after a write instead of a full refresh, so only the written set
+        goes over the wire.
+        """
+        unit, name = self.store.register_sets[key]
+        block = plan_single_read(name)
+        try:
+            data = await self.fetch_registers(unit, block.address, block.count)
+        except UpdateFailed as e:
+            _LOGGER.debug("read back of %s failed, the next update will: %s", key, e)
+            return
+        changed: set[str] = set()
+        self.process_block(unit, block, data, changed)
+        if changed:
+            self.notify_changed(changed)
+
+    def notify_changed(self, keys: set[str]) -> None:
+        """Notify the entities of keys outside of a regular update."""
+        # an update can be in progress, keep collecting its changes
+        changed_keys = self.changed_keys
+        self.changed_keys = keys
+        self.async_update_listeners()
+        self.changed_keys = changed_keys
 
     def processed_data(self):
         """Return the processed data."""
         return self.data
 
-    async def fetch_registers(self, unit, registerData):
+    async def fetch_registers(self, unit, address, count):
         """Fetch the registers."""
         try:
+            if isinstance(self.api, VictronAsyncHub):
+                return await self.api.read_holding_registers(
+                    unit=unit, address=address, count=count
+                )
             # run api_update in async job
             return await self.hass.async_add_executor_job(
-                self.api_update, unit, registerData
+                self.api_update, unit, address, count
             )
 
-        except HomeAssistantError as e:
+        except (HomeAssistantError, ModbusException) as e:
             raise UpdateFailed("Fetching registers failed") from e
 
-    def write_register(self, unit, address, value):
-        """Write to the register."""
-        # try:
-
-        self.api_write(unit, address, value)
+    async def async_write_register(
+        self, unit, address, value, *, coalesce=False
+    ) -> bool:
+        """Write to the register, raises VictronWriteError if the write failed.
+
+        With coalesce the write waits for the coalescing window, so a burst of
+        writes to the register (e.g. a slider being dragged) is sent once.
+        Returns False if the value was replaced by a later write of the burst
+        and never sent.
+        """
+        if coalesce:
+            return await self.write_coalescer.async_write(unit, address, value)
+        await self.write_queue.async_write(unit, address, value)
+        return True
+
+    async def send_write(self, unit, address, value):
+        """Send a write to the device, called by the write queue."""
+        if isinstance(self.api, VictronAsyncHub):
+            if not self.api.is_still_connected():
+                await self.api.connect()
+            return await self.api.write_register(
+                unit=unit, address=address, value=value
+            )
+        return await self.hass.async_add_executor_job(
+            self.api_write, unit, address, value
+        )
 
-    # except HomeAssistantError as e:
-    # TODO raise specific write error
-    # _LOGGER.error("failed to write to option:", e
+    def close(self):
+        """Close the connection to the GX device."""
+        self.write_coalescer.stop()
+        self.write_queue.stop()
+        self.api.disconnect()
 
     def api_write(self, unit, address, value):
         """Write to the api."""
         # recycle connection
         return self.api.write_register(unit=unit, address=address, value=value)
 
-    def api_update(self, unit, registerInfo):
+    def api_update(self, unit, address, count):
         """Update the api."""
         # recycle connection
-        return self.api.read_holding_registers(
-            unit=unit,
-            address=self.api.get_first_register_id(registerInfo),
-            count=self.api.calculate_register_count(registerInfo),
-        )
+        return self.api.read_holding_registers(unit=unit, address=address, count=count)
 
 
 class DecodeDataTypeUnsupported(Exception):
@@ -0,0 +1,127 @@
+"""Precompiled decode plans for Victron register sets."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cache
+import struct
+
+from .codec import STRUCT_FORMATS
+from .const import STRING, register_info_dict
+
+# How a raw value is turned into the reported value
+DECODE_STRING = 0
+DECODE_ROUND = 1
+DECODE_SCALE = 2
+
+
+@dataclass(frozen=True)
+class DecodePlan:
+    """Everything needed to decode one register set of one unit in a single pass."""
+
+    keys: tuple[str, ...]
+    layout: struct.Struct
+    # (decode kind, scale, deadband) per key
+    conversions: tuple[tuple[int, float, float], ...]
+    # (byte offset, byte length, layout) of every key within the set
+    fields: tuple[tuple[int, int, struct.Struct], ...]
+
+    def decode_into(
+        self, buffer: bytes, offset: int, values: list, slots, changed: set[str]
+    ) -> None:
+        """Decode the set starting at register ``offset`` of ``buffer`` into values.
+
+        ``slots`` holds the index in ``values`` of every key of the plan. Keys
+        whose value differs from the stored one (by more than their deadband)
+        are added to ``changed``.
+        """
+        for key, slot, conversion, raw in zip(
+            self.keys,
+            slots,
+            self.conversions,
+            self.layout.unpack_from(buffer, offset * 2),
+            strict=True,
+        ):
+            _store(key, slot, conversion, raw, values=values, changed=changed)
+
+    def decode_changed_into(
+        self, raw: bytes, previous: bytes, values: list, slots, changed: set[str]
+    ) -> None:
+        """Decode only the keys whose words differ between two reads of the set.
+
+        ``raw`` and ``previous`` hold the words of just this set, like
+        ``raw_words`` returns them.
+        """
+        for key, slot, conversion, (start, length, layout) in zip(
+            self.keys, slots, self.conversions, self.fields, strict=True
+        ):
+            if raw[start : start + length] != previous[start : start + length]:
+                _store(
+                    key,
+                    slot,
+                    conversion,
+                    layout.unpack_from(raw, start)[0],
+                    values=values,
+                    changed=changed,
+                )
+
+    def raw_words(self, buffer: bytes, offset: int) -> bytes:
+        """Return the bytes of the set starting at register ``offset`` of ``buffer``."""
+        return buffer[offset * 2 : offset * 2 + self.layout.size]
+
+
+def _store(key, slot, conversion, raw, *, values: list, changed: set[str]) -> None:
+    """Convert a raw value and store it if it changed."""
+    kind, scale, deadband = conversion
+    if kind == DECODE_SCALE:
+        value = raw / scale
+    elif kind == DECODE_ROUND:
+        value = round(raw)
+    else:
+        value = raw.split(b"\x00", 1)[0].decode("ascii", "replace")
+
+    previous = values[slot]
+    if value == previous or (
+        deadband and previous is not None and abs(value - previous) <= deadband
+    ):
+        return
+    values[slot] = value
+    changed.add(key)
+
+
+def pack_registers(registers: list[int]) -> bytes:
+    """Pack register words into a big endian byte buffer."""
+    return struct.pack(f">{len(registers)}H", *registers)
+
+
+@cache
+def decode_plan(name: str, unit) -> DecodePlan:
+    """Compile the decode plan of a register set for a unit."""
+    keys = []
+    fmt = ">"
+    conversions = []
+    fields = []
+    start = 0
+    for key, registerInfo in register_info_dict[name].items():
+        keys.append(f"{unit}.{key}")
+        if isinstance(registerInfo.dataType, STRING):
+            field = f"{registerInfo.dataType.length * 2}s"
+            conversions.append((DECODE_STRING, 1, 0))
+        else:
+            field = STRUCT_FORMATS[registerInfo.dataType]
+            deadband = registerInfo.deadband
+            if deadband:
+                # decoded values are multiples of 1 / scale, half a step more
+                # keeps float rounding from deciding whether a change counts
+                deadband += 0.5 / registerInfo.scale
+            if registerInfo.unit == "" and registerInfo.scale == 1:
+                conversions.append((DECODE_ROUND, 1, deadband))
+            else:
+                conversions.append((DECODE_SCALE, registerInfo.scale, deadband))
+        layout = struct.Struct(f">{field}")
+        fields.append((start, layout.size, layout))
+        start += layout.size
+        fmt += field
+    return DecodePlan(
+        tuple(keys), struct.Struct(fmt), tuple(conversions), tuple(fields)
+    )
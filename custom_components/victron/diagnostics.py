@@ -0,0 +1,26 @@
+"""Diagnostics support for the victron integration."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import victronEnergyDeviceUpdateCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: victronEnergyDeviceUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ]
+    return {
+        "register_set": coordinator.decodeInfo,
+        # coalesced counts the writes a later value of the same register replaced
+        "write_stats": asdict(coordinator.write_queue.stats),
+    }
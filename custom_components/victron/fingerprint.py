@@ -0,0 +1,185 @@
+"""Persistent discovery results keyed by the GX device they were found on."""
+
+from __future__ import annotations
+
+import logging
+
+from pymodbus.exceptions import ModbusException
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import CONF_HOST, CONF_PORT, DISCOVERY_FINGERPRINT, DOMAIN, SCAN_REGISTERS
+from .hub import VictronHub
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.discovery"
+
+
+class VictronDiscoveryCache:
+    """Discovered register sets and fingerprints stored per GX serial.
+
+    Outlives the config entry, so reinstalling the integration for the same
+    GX device does not need a full scan.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+
+    async def async_get(self, serial: str) -> dict | None:
+        """Return the cached fingerprint and register sets of a serial."""
+        data = await self._store.async_load() or {}
+        return data.get(serial)
+
+    async def async_set(self, fingerprint: dict, registers: dict) -> None:
+        """Store the fingerprint and register sets of a GX device."""
+        data = await self._store.async_load() or {}
+        data[fingerprint["serial"]] = {
+            DISCOVERY_FINGERPRINT: fingerprint,
+            SCAN_REGISTERS: registers,
+        }
+        await self._store.async_save(data)
+
+
+def topology_from_cache(registers: dict) -> dict[int, list[str]]:
+    """Return the cached register sets keyed by unit id again."""
+    return {int(unit): list(names) for unit, names in registers.items()}
+
+
+async def async_discover(
+    hass: HomeAssistant, hub: VictronHub, *, use_cache: bool = True
+) -> tuple[dict, dict | None]:
+    """Return the present register sets and the fingerprint of the GX device.
+
+    With use_cache a cached topology of the same GX device is validated with a
+    few reads and only a changed fingerprint leads to a full scan.
+    """
+    cache = VictronDiscoveryCache(hass)
+    if use_cache:
+        identity = await hass.async_add_executor_job(hub.read_fingerprint, {})
+        cached = identity and await cache.async_get(identity["serial"])
+        if cached:
+            topology = topology_from_cache(cached[SCAN_REGISTERS])
+            fingerprint = await hass.async_add_executor_job(
+                hub.read_fingerprint, topology
+            )
+            if fingerprint is not None and not fingerprint_changed(
+                fingerprint, cached[DISCOVERY_FINGERPRINT]
+            ):
+                _LOGGER.debug("using cached devices of %s", fingerprint["serial"])
+                return topology, fingerprint
+            _LOGGER.info(
+                "GX device %s changed since it was last scanned, rescanning",
+                fingerprint and fingerprint["serial"],
+            )
+
+    registers = await hass.async_add_executor_job(hub.determine_present_devices)
+    fingerprint = await hass.async_add_executor_job(hub.read_fingerprint, registers)
+    if fingerprint is not None:
+        await cache.async_set(fingerprint, registers)
+    return registers, fingerprint
+
+
+def fingerprint_changed(fingerprint: dict, cached: dict) -> bool:
+    """Return True if the GX device differs from its cached fingerprint.
+
+    Parts that could not be read (None), e.g. a unit that is switched off,
+    are unknown and do not count as a change.
+    """
+    if fingerprint["serial"] != cached["serial"]:
+        return True
+    if fingerprint["firmware"] is not None and fingerprint["firmware"] != cached.get(
+        "firmware"
+    ):
+        return True
+    cached_units = cached.get("units", {})
+    return any(
+        identity is not None and cached_units.get(unit) != identity
+        for unit, identity in fingerprint["units"].items()
+    )
+
+
+async def async_validate_entry(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict | None:
+    """Check that the devices of the config entry are still the same.
+
+    Only reads the fingerprint, so it does not hold up the setup of the entry.
+    Returns the current fingerprint when the GX device changed, the entry then
+    has to be rescanned with async_rescan_entry. Entries without a fingerprint
+    get one recorded.
+    """
+    hub = VictronHub(config_entry.options[CONF_HOST], config_entry.options[CONF_PORT])
+    topology = config_entry.data[SCAN_REGISTERS]
+    try:
+        if not await hass.async_add_executor_job(hub.connect):
+            # the first refresh of the coordinator reports the connection error
+            return None
+        fingerprint = await hass.async_add_executor_job(hub.read_fingerprint, topology)
+    except ModbusException as e:
+        # the first refresh of the coordinator reports an unresponsive device
+        _LOGGER.debug("Skipping the validation of the scanned devices: %s", e)
+        return None
+    finally:
+        await hass.async_add_executor_job(hub.disconnect)
+
+    cached = config_entry.data.get(DISCOVERY_FINGERPRINT)
+    if fingerprint is None:
+        return None
+    if cached is None:
+        hass.config_entries.async_update_entry(
+            config_entry,
+            data={**config_entry.data, DISCOVERY_FINGERPRINT: fingerprint},
+        )
+        await VictronDiscoveryCache(hass).async_set(fingerprint, topology)
+        return None
+    if not fingerprint_changed(fingerprint, cached):
+        return None
+    _LOGGER.info(
+        "GX device %s changed since it was last scanned, rescanning",
+        fingerprint["serial"],
+    )
+    return fingerprint
+
+
+async def async_rescan_entry(
+    hass: HomeAssistant, config_entry: ConfigEntry, fingerprint: dict
+) -> None:
+    """Rescan the devices of a config entry whose GX device changed.
+
+    Runs after the entry was set up, updating the entry reloads it when the
+    register sets changed. Units that did not answer the fingerprint read
+    (``fingerprint``) and are not found by the scan keep their register sets,
+    so a device that is switched off does not lose its entities.
+    """
+    hub = VictronHub(config_entry.options[CONF_HOST], config_entry.options[CONF_PORT])
+    try:
+        if not await hass.async_add_executor_job(hub.connect):
+            _LOGGER.warning("Rescanning the devices failed, can not connect")
+            return
+        topology = await hass.async_add_executor_job(hub.determine_present_devices)
+        found = {int(unit) for unit in topology}
+        for unit, names in config_entry.data[SCAN_REGISTERS].items():
+            if int(unit) not in found and fingerprint["units"].get(str(unit)) is None:
+                topology[int(unit)] = list(names)
+        fingerprint = await hass.async_add_executor_job(hub.read_fingerprint, topology)
+    except ModbusException as e:
+        _LOGGER.warning("Rescanning the devices failed: %s", e)
+        return
+    finally:
+        await hass.async_add_executor_job(hub.disconnect)
+
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={
+            **config_entry.data,
+            SCAN_REGISTERS: topology,
+            DISCOVERY_FINGERPRINT: fingerprint,
+        },
+    )
+    if fingerprint is not None:
+        await VictronDiscoveryCache(hass).async_set(fingerprint, topology)
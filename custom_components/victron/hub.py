@@ -1,31 +1,85 @@
 """Support for Victron Energy devices."""
 
+import asyncio
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
 import logging
+from queue import Queue
 import threading
+import time
 
-from packaging import version
-import pymodbus
-from pymodbus.client import ModbusTcpClient
+from pymodbus.client import AsyncModbusTcpClient, ModbusTcpClient
 
 from homeassistant.exceptions import HomeAssistantError
 
+from .codec import decode_number, decode_string, word_count
 from .const import (
-    INT16,
-    INT32,
-    INT64,
-    STRING,
-    UINT16,
-    UINT32,
-    UINT64,
+    DISCOVERY_CONNECTIONS,
+    DISCOVERY_MAX_IN_FLIGHT,
+    DISCOVERY_TIMEOUT,
+    GATEWAY_EXCEPTION_CODES,
+    POLL_CONNECTIONS,
+    POLL_MAX_IN_FLIGHT,
+    POLL_PIPELINE_DEPTH,
+    SHARED_UNIT_FAMILIES,
+    ProbeResult,
     register_info_dict,
     valid_unit_ids,
 )
+from .pipeline import VictronPipelinedClient
+from .planner import (
+    is_family_anchor,
+    register_set_family,
+    register_set_span,
+    sentinel_read,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class VictronHub:
+def classify_response(result) -> ProbeResult:
+    """Classify the response to a probing read."""
+    if not result.isError():
+        return ProbeResult.PRESENT
+    if getattr(result, "exception_code", None) in GATEWAY_EXCEPTION_CODES:
+        return ProbeResult.UNIT_ABSENT
+    return ProbeResult.MISSING
+
+
+class VictronBaseHub:
+    """Register helpers shared by the sync and async Victron hubs."""
+
+    def convert_string_from_register(self, segment, string_encoding="ascii"):
+        """Convert from registers to the appropriate data type."""
+        return decode_string(segment, string_encoding)
+
+    def convert_number_from_register(self, segment, dataType):
+        """Convert from registers to the appropriate data type."""
+        return decode_number(segment, dataType)
+
+    def calculate_register_count(self, registerInfoDict: OrderedDict):
+        """Calculate the number of registers to read."""
+        return register_set_span(registerInfoDict)[1]
+
+    def get_first_register_id(self, registerInfoDict: OrderedDict):
+        """Return first register id."""
+        first_register = next(iter(registerInfoDict))
+        return registerInfoDict[first_register].register
+
+    def discovery_probes(self):
+        """Return the (unit, register set) pairs that discovery has to check."""
+        probes = []
+        for unit in valid_unit_ids:
+            for key in register_info_dict:
+                # VE.CAN device zero is present under unit 100. This seperates non system / settings entities into the seperate can device
+                if unit == 100 and not key.startswith(("settings", "system")):
+                    continue
+                probes.append((unit, key))
+        return probes
+
+
+class VictronHub(VictronBaseHub):
     """Victron Hub."""
 
     def __init__(self, host: str, port: int) -> None:
@@ -39,40 +93,6 @@ class VictronHub:
         """Check if the connection is still open."""
         return self._client.is_socket_open()
 
-    def convert_string_from_register(self, segment, string_encoding="ascii"):
-        """Convert from registers to the appropriate data type."""
-        if (
-            version.parse("3.8.0")
-            <= version.parse(pymodbus.__version__)
-            <= version.parse("3.8.4")
-        ):
-            return self._client.convert_from_registers(
-                segment, self._client.DATATYPE.STRING
-            ).split("\x00")[0]
-        return self._client.convert_from_registers(
-            segment, self._client.DATATYPE.STRING, string_encoding=string_encoding
-        ).split("\x00")[0]
-
-    def convert_number_from_register(self, segment, dataType):
-        """Convert from registers to the appropriate data type."""
-        if dataType == UINT16:
-            raw = self._client.convert_from_registers(
-                segment, data_type=self._client.DATATYPE.UINT16
-            )
-        elif dataType == INT16:
-            raw = self._client.convert_from_registers(
-                segment, data_type=self._client.DATATYPE.INT16
-            )
-        elif dataType == UINT32:
-            raw = self._client.convert_from_registers(
-                segment, data_type=self._client.DATATYPE.UINT32
-            )
-        elif dataType == INT32:
-            raw = self._client.convert_from_registers(
-                segment, data_type=self._client.DATATYPE.INT32
-            )
-        return raw
-
     def connect(self):
         """Connect to the Modbus TCP server."""
         return self._client.connect()
@@ -86,72 +106,337 @@ class VictronHub:
     def write_register(self, unit, address, value):
         """Write a register."""
         slave = int(unit) if unit else 1
-        return self._client.write_register(
-            address=address, value=value, device_id=slave
-        )
+        with self._lock:
+            return self._client.write_register(
+                address=address, value=value, device_id=slave
+            )
 
     def read_holding_registers(self, unit, address, count):
         """Read holding registers."""
         slave = int(unit) if unit else 1
         _LOGGER.info("Reading unit %s address %s count %s", unit, address, count)
-        return self._client.read_holding_registers(
-            address=address, count=count, device_id=slave
-        )
+        with self._lock:
+            return self._client.read_holding_registers(
+                address=address, count=count, device_id=slave
+            )
 
-    def calculate_register_count(self, registerInfoDict: OrderedDict):
-        """Calculate the number of registers to read."""
-        first_key = next(iter(registerInfoDict))
-        last_key = next(reversed(registerInfoDict))
-        end_correction = 1
-        if registerInfoDict[last_key].dataType in (INT32, UINT32):
-            end_correction = 2
-        elif registerInfoDict[last_key].dataType in (INT64, UINT64):
-            end_correction = 4
-        elif isinstance(registerInfoDict[last_key].dataType, STRING):
-            end_correction = registerInfoDict[last_key].dataType.length
-
-        return (
-            registerInfoDict[last_key].register - registerInfoDict[first_key].register
-        ) + end_correction
+    def probe_register_set(
+        self,
+        client: ModbusTcpClient,
+        unit,
+        key,
+        sentinel: bool = True,
+        full_range: bool = True,
+    ) -> ProbeResult:
+        """Check if a register set can be read from a unit.
 
-    def get_first_register_id(self, registerInfoDict: OrderedDict):
-        """Return first register id."""
-        first_register = next(iter(registerInfoDict))
-        return registerInfoDict[first_register].register
+        A sentinel of one or two words is read first, the full range is only
+        read to confirm a set whose sentinel answered. Either read can be
+        left out when it was already done or is done later.
+        """
+        _LOGGER.debug("Checking unit %s for register set %s", unit, key)
+        register_definition = register_info_dict[key]
+        reads = []
+        if sentinel:
+            reads.append(sentinel_read(key))
+        if full_range:
+            reads.append(
+                (
+                    self.get_first_register_id(register_definition),
+                    self.calculate_register_count(register_definition),
+                )
+            )
+        for address, count in reads:
+            try:
+                result = client.read_holding_registers(
+                    address=address, count=count, device_id=int(unit) if unit else 1
+                )
+            except HomeAssistantError as e:
+                _LOGGER.error(e)
+                return ProbeResult.MISSING
+            outcome = classify_response(result)
+            if outcome is not ProbeResult.PRESENT:
+                _LOGGER.debug(
+                    "result is %s for unit: %s address: %s count: %s",
+                    outcome.value,
+                    unit,
+                    address,
+                    count,
+                )
+                return outcome
+        return ProbeResult.PRESENT
 
-    def determine_present_devices(self):
-        """Determine which devices are present."""
-        valid_devices = {}
+    def fingerprint_probe(self, names) -> tuple[int, bool]:
+        """Return the address identifying a unit and if it holds a product id.
+
+        Units with a product id register are identified by it, others only by
+        being able to read the first register of their first register set.
+        """
+        for name in names:
+            for key, registerInfo in register_info_dict[name].items():
+                if key.endswith("productid"):
+                    return registerInfo.register, True
+        return register_set_span(register_info_dict[names[0]])[0], False
 
+    def read_fingerprint(self, topology: dict) -> dict | None:
+        """Read the serial, firmware and per unit identity of the GX device.
+
+        Returns None if the serial can not be read.
+        """
+        serial_register = register_info_dict["system_registers"]["system_serial"]
+        result = self.read_holding_registers(
+            100,
+            serial_register.register,
+            word_count(serial_register.dataType),
+        )
+        if result.isError():
+            return None
+        firmware = self.read_holding_registers(
+            100, *register_set_span(register_info_dict["system_firmware_registers"])
+        )
+        units = {}
+        for unit, names in topology.items():
+            if not names:
+                continue
+            address, is_product = self.fingerprint_probe(names)
+            probe = self.read_holding_registers(unit, address, 1)
+            if probe.isError():
+                units[str(unit)] = None
+            else:
+                units[str(unit)] = probe.registers[0] if is_product else 0
+        return {
+            "serial": self.convert_string_from_register(result.registers),
+            "firmware": None if firmware.isError() else list(firmware.registers),
+            "units": units,
+        }
+
+    def determine_present_devices(
+        self,
+        connections: int = DISCOVERY_CONNECTIONS,
+        max_in_flight: int = DISCOVERY_MAX_IN_FLIGHT,
+        timeout: float = DISCOVERY_TIMEOUT,
+    ):
+        """Determine which devices are present.
+
+        Discovery runs in phases. The device classes of a unit are identified
+        by the sentinel of their anchor set, classes that share a unit with a
+        matched one (SHARED_UNIT_FAMILIES) count as matched too. A unit that
+        answers but matches no class has the sentinels of all other sets read
+        instead. Every set of the classes found is then confirmed by reading
+        its full range.
+        Probes are spread over a pool of ``connections`` sockets with at most
+        ``max_in_flight`` outstanding at a time. Probes that did not finish
+        before ``timeout`` seconds are treated as absent. Once a unit answers
+        with a gateway exception its remaining probes are skipped.
+        """
         _LOGGER.debug("Determining present devices")
 
-        for unit in valid_unit_ids:
-            working_registers = []
-            for key, register_definition in register_info_dict.items():
-                _LOGGER.debug("Checking unit %s for register set %s", unit, key)
-                # VE.CAN device zero is present under unit 100. This seperates non system / settings entities into the seperate can device
-                if unit == 100 and not key.startswith(("settings", "system")):
-                    continue
+        probes = self.discovery_probes()
+        clients = Queue()
+        clients.put(self._client)
+        extra_clients = []
+        for _ in range(max(connections, 1) - 1):
+            client = ModbusTcpClient(host=self.host, port=self.port)
+            if client.connect():
+                extra_clients.append(client)
+                clients.put(client)
+
+        absent_units = set()
 
-                try:
-                    address = self.get_first_register_id(register_definition)
-                    count = self.calculate_register_count(register_definition)
-                    result = self.read_holding_registers(unit, address, count)
-                    if result.isError():
-                        _LOGGER.debug(
-                            "result is error for unit: %s address: %s count: %s",
-                            unit,
-                            address,
-                            count,
-                        )
-                    else:
-                        working_registers.append(key)
-                except HomeAssistantError as e:
-                    _LOGGER.error(e)
+        def run_probe(unit, key, sentinel, full_range):
+            if unit in absent_units:
+                return ProbeResult.UNIT_ABSENT
+            client = clients.get()
+            try:
+                if time.monotonic() > deadline:
+                    return ProbeResult.MISSING
+                result = self.probe_register_set(
+                    client, unit, key, sentinel=sentinel, full_range=full_range
+                )
+            finally:
+                clients.put(client)
+            if result is ProbeResult.UNIT_ABSENT and unit not in absent_units:
+                _LOGGER.debug("no device behind unit %s, skipping it", unit)
+                absent_units.add(unit)
+            return result
 
+        def run_phase(executor, phase_probes) -> set[tuple[int, str]]:
+            """Run (unit, key, sentinel, full_range) probes, return those present."""
+            futures = {
+                executor.submit(run_probe, *probe): probe[:2] for probe in phase_probes
+            }
+            done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+            for future in not_done:
+                future.cancel()
+            if not_done:
+                _LOGGER.warning(
+                    "Discovery deadline of %s seconds reached, %s of %s probes were not completed",
+                    timeout,
+                    len(not_done),
+                    len(phase_probes),
+                )
+            present = set()
+            for future in done:
+                if future.exception() is not None:
+                    _LOGGER.debug(
+                        "probe of unit %s register set %s failed: %s",
+                        *futures[future],
+                        future.exception(),
+                    )
+                elif future.result() is ProbeResult.PRESENT:
+                    present.add(futures[future])
+            return present
+
+        deadline = time.monotonic() + timeout
+        try:
+            with ThreadPoolExecutor(
+                max_workers=max(min(max_in_flight, clients.qsize()), 1),
+                thread_name_prefix="victron_discovery",
+            ) as executor:
+                # identify the device classes of each unit by the sentinel of
+                # their anchor set
+                sentinels = [
+                    (unit, key) for unit, key in probes if is_family_anchor(key)
+                ]
+                answered = run_phase(
+                    executor, [(unit, key, True, False) for unit, key in sentinels]
+                )
+                # a unit serves the classes its anchors matched, plus the
+                # classes that share a unit with those
+                families = {
+                    (unit, family)
+                    for unit, key in answered
+                    for family in (
+                        register_set_family(key),
+                        *SHARED_UNIT_FAMILIES.get(register_set_family(key), ()),
+                    )
+                }
+                # a unit that answers but matched no anchor can still hold sets
+                # of a class without its anchor set, the sentinels of all other
+                # sets identify those
+                identified = {unit for unit, _ in answered}
+                fallback = [
+                    (unit, key)
+                    for unit, key in probes
+                    if not is_family_anchor(key)
+                    and unit not in identified
+                    and unit not in absent_units
+                ]
+                answered |= run_phase(
+                    executor, [(unit, key, True, False) for unit, key in fallback]
+                )
+                sentinels = {*sentinels, *fallback}
+                families |= {(unit, register_set_family(key)) for unit, key in answered}
+                # confirm every set of the classes found by its full range, the
+                # sentinel is only read for the sets it was not read for yet
+                present = run_phase(
+                    executor,
+                    [
+                        (unit, key, (unit, key) not in sentinels, True)
+                        for unit, key in probes
+                        if (unit, register_set_family(key)) in families
+                        and ((unit, key) in answered or (unit, key) not in sentinels)
+                    ],
+                )
+        finally:
+            for client in extra_clients:
+                client.close()
+
+        valid_devices = {}
+        for unit in valid_unit_ids:
+            working_registers = [
+                key for key in register_info_dict if (unit, key) in present
+            ]
             if len(working_registers) > 0:
                 valid_devices[unit] = working_registers
             else:
                 _LOGGER.debug("no registers found for unit: %s", unit)
 
         return valid_devices
+
+
+class VictronAsyncHub(VictronBaseHub):
+    """Victron Hub running on a pool of pymodbus asyncio clients.
+
+    Reads and writes are awaited directly on the event loop instead of being
+    handed to the executor. Discovery still runs on VictronHub.
+
+    Every unit is routed to one of ``connections`` sockets, so different units
+    are read in parallel while the requests of a unit keep their order. Each
+    socket carries one request at a time and at most ``max_in_flight``
+    requests are outstanding over all sockets to spare the GX CPU. The
+    socket is taken before a slot of ``max_in_flight``, so requests queued
+    behind a busy socket never hold a slot another socket could use.
+
+    With a ``pipeline_depth`` above one the sockets are VictronPipelinedClient
+    connections, which keep up to that many requests of their units in
+    flight instead of one. ``max_in_flight`` does not apply then, the
+    connections limit the requests to ``connections`` x ``pipeline_depth``.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        connections: int = POLL_CONNECTIONS,
+        max_in_flight: int = POLL_MAX_IN_FLIGHT,
+        pipeline_depth: int = POLL_PIPELINE_DEPTH,
+    ) -> None:
+        """Initialize."""
+        self.host = host
+        self.port = port
+        if pipeline_depth > 1:
+            self._clients = [
+                VictronPipelinedClient(self.host, self.port, pipeline_depth)
+                for _ in range(max(connections, 1))
+            ]
+            # the pipelined clients limit their own requests in flight
+            self._locks = [nullcontext() for _ in self._clients]
+            self._in_flight = nullcontext()
+        else:
+            self._clients = [
+                AsyncModbusTcpClient(host=self.host, port=self.port)
+                for _ in range(max(connections, 1))
+            ]
+            self._locks = [asyncio.Lock() for _ in self._clients]
+            self._in_flight = asyncio.Semaphore(max(max_in_flight, 1))
+
+    def is_still_connected(self):
+        """Check if all connections are still open."""
+        return all(client.connected for client in self._clients)
+
+    async def connect(self):
+        """Connect the connections that are not open to the Modbus TCP server."""
+        results = await asyncio.gather(
+            *(client.connect() for client in self._clients if not client.connected)
+        )
+        return all(results)
+
+    def disconnect(self):
+        """Disconnect from the Modbus TCP server."""
+        for client in self._clients:
+            if client.connected:
+                client.close()
+
+    def _route(self, unit) -> int:
+        """Return the index of the connection serving a unit."""
+        return (int(unit) if unit else 1) % len(self._clients)
+
+    async def write_register(self, unit, address, value):
+        """Write a register."""
+        slave = int(unit) if unit else 1
+        index = self._route(unit)
+        async with self._locks[index], self._in_flight:
+            return await self._clients[index].write_register(
+                address=address, value=value, device_id=slave
+            )
+
+    async def read_holding_registers(self, unit, address, count):
+        """Read holding registers."""
+        slave = int(unit) if unit else 1
+        _LOGGER.debug("Reading unit %s address %s count %s", unit, address, count)
+        index = self._route(unit)
+        async with self._locks[index], self._in_flight:
+            return await self._clients[index].read_holding_registers(
+                address=address, count=count, device_id=slave
+            )
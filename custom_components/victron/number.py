@@ -14,28 +14,30 @@ from homeassistant.components.number import (
 )
 from homeassistant.const import (
     PERCENTAGE,
+    Platform,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
     UnitOfPower,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .base import VictronWriteBaseEntityDescription
+from .base import (
+    VictronEntity,
+    VictronWriteBaseEntityDescription,
+    async_listen_new_register_sets,
+)
 from .const import (
     CONF_AC_CURRENT_LIMIT,
     CONF_AC_SYSTEM_VOLTAGE,
-    CONF_ADVANCED_OPTIONS,
     CONF_DC_CURRENT_LIMIT,
     CONF_DC_SYSTEM_VOLTAGE,
     CONF_NUMBER_OF_PHASES,
     CONF_USE_SLIDERS,
     DOMAIN,
     UINT16_MAX,
-    SliderWriteType,
-    register_info_dict,
 )
 from .coordinator import victronEnergyDeviceUpdateCoordinator
 
@@ -52,55 +54,52 @@ async def async_setup_entry(
         config_entry.entry_id
     ]
     _LOGGER.debug("attempting to setup number entities")
-    descriptions = []
-    _LOGGER.debug(config_entry)
-    # TODO cleanup
-    if config_entry.options[CONF_ADVANCED_OPTIONS]:
-        register_set = victron_coordinator.processed_data()["register_set"]
-        for slave, registerLedger in register_set.items():
-            for name in registerLedger:
-                for register_name, registerInfo in register_info_dict[name].items():
-                    _LOGGER.debug(
-                        "unit == %s registerLedger == %s registerInfo",
-                        slave,
-                        registerLedger,
-                    )
-
-                    if isinstance(registerInfo.entityType, SliderWriteType):
-                        description = VictronEntityDescription(
-                            key=register_name,
-                            name=register_name.replace("_", " "),
-                            slave=slave,
-                            native_unit_of_measurement=registerInfo.unit,
-                            mode=NumberMode.SLIDER
-                            if config_entry.options[CONF_USE_SLIDERS]
-                            else NumberMode.BOX,
-                            native_min_value=determine_min_value(
-                                registerInfo.unit,
-                                config_entry.options,
-                                registerInfo.entityType.powerType,
-                                registerInfo.entityType.negative,
-                            ),
-                            native_max_value=determine_max_value(
-                                registerInfo.unit,
-                                config_entry.options,
-                                registerInfo.entityType.powerType,
-                            ),
-                            entity_category=EntityCategory.CONFIG,
-                            address=registerInfo.register,
-                            scale=registerInfo.scale,
-                            native_step=registerInfo.step,
-                        )
-                        _LOGGER.debug("composed description == %s", descriptions)
-                        descriptions.append(description)
-
-    entities = []
-    entity = {}
-    for description in descriptions:
-        entity = description
-        entities.append(VictronNumber(victron_coordinator, entity))
-    _LOGGER.debug("adding number")
-    async_add_entities(entities)
+
+    @callback
+    def async_add_register_sets(register_set: dict) -> None:
+        """Add the entities of the given register sets."""
+        descriptions = []
+        _LOGGER.debug(config_entry)
+        for entry in victron_coordinator.entity_catalog.entries(
+            Platform.NUMBER, register_set
+        ):
+            registerInfo = entry.register_info
+            description = VictronEntityDescription(
+                key=entry.key,
+                name=entry.key.replace("_", " "),
+                slave=entry.unit,
+                native_unit_of_measurement=registerInfo.unit,
+                mode=NumberMode.SLIDER
+                if config_entry.options[CONF_USE_SLIDERS]
+                else NumberMode.BOX,
+                native_min_value=determine_min_value(
+                    registerInfo.unit,
+                    config_entry.options,
+                    registerInfo.entityType.powerType,
+                    registerInfo.entityType.negative,
+                ),
+                native_max_value=determine_max_value(
+                    registerInfo.unit,
+                    config_entry.options,
+                    registerInfo.entityType.powerType,
+                ),
+                entity_category=EntityCategory.CONFIG,
+                address=registerInfo.register,
+                scale=registerInfo.scale,
+                native_step=registerInfo.step,
+            )
+            descriptions.append(description)
+
+        entities = []
+        entity = {}
+        for description in descriptions:
+            entity = description
+            entities.append(VictronNumber(victron_coordinator, entity))
+        _LOGGER.debug("adding number")
+        async_add_entities(entities)
+
+    async_add_register_sets(victron_coordinator.processed_data()["register_set"])
+    async_listen_new_register_sets(hass, config_entry, async_add_register_sets)
     _LOGGER.debug("adding numbering")
 
 
@@ -208,7 +207,7 @@ class VictronEntityDescription(
     key: str | None = None
 
 
-class VictronNumber(NumberEntity):
+class VictronNumber(VictronEntity, NumberEntity):
     """Victron number."""
 
     description: VictronEntityDescription
@@ -223,13 +222,9 @@ class VictronNumber(NumberEntity):
         self.description = description
         self._attr_name = f"{description.name}"
 
-        self.data_key = str(self.description.slave) + "." + str(self.description.key)
+        self.init_data_access(coordinator, description)
 
-        self._attr_native_value = self.description.value_fn(
-            self.coordinator.processed_data(),
-            self.description.slave,
-            self.description.key,
-        )
+        self._attr_native_value = self.value
 
         self._attr_unique_id = f"{self.description.slave}_{self.description.key}"
         if self.description.slave not in (100, 225):
@@ -244,7 +239,7 @@ class VictronNumber(NumberEntity):
         # TODO convert float to int again with scale respected
         if value < 0:
             value = UINT16_MAX + value
-        self.coordinator.write_register(
+        written = await self.coordinator.async_write_register(
             unit=self.description.slave,
             address=self.description.address,
             value=self.coordinator.encode_scaling(
@@ -252,17 +247,16 @@ class VictronNumber(NumberEntity):
                 self.description.native_unit_of_measurement,
                 self.description.scale,
             ),
+            coalesce=True,
         )
-        await self.coordinator.async_update_local_entry(self.data_key, int(value))
+        if written:
+            # only the last value of a burst reached the device
+            await self.coordinator.async_update_local_entry(self.data_key, int(value))
 
     @property
     def native_value(self) -> float:
         """Return the state of the entity."""
-        value = self.description.value_fn(
-            data=self.coordinator.processed_data(),
-            slave=self.description.slave,
-            key=self.description.key,
-        )
+        value = self.value
         if value > round(
             UINT16_MAX / 2
         ):  # Half of the UINT16 is reserved for positive and half for negative values
@@ -298,12 +292,6 @@ class VictronNumber(NumberEntity):
         """Return the maximum value of the entity."""
         return self.description.native_max_value
 
-    @property
-    def available(self) -> bool:
-        """Return True if entity is available."""
-        full_key = str(self.description.slave) + "." + self.description.key
-        return self.coordinator.processed_data()["availability"][full_key]
-
     @property
     def device_info(self) -> entity.DeviceInfo:
         """Return the device info."""
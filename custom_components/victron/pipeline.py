@@ -0,0 +1,206 @@
+"""Modbus TCP client keeping several requests in flight on one socket."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import struct
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+_LOGGER = logging.getLogger(__name__)
+
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_REGISTER = 0x06
+
+MBAP_HEADER = struct.Struct(">HHHB")
+
+
+@dataclass
+class PipelinedResponse:
+    """Response to a pipelined request, shaped like the pymodbus responses."""
+
+    function_code: int
+    registers: list[int] = field(default_factory=list)
+    exception_code: int | None = None
+
+    def isError(self) -> bool:
+        """Return True for an exception response."""
+        return self.exception_code is not None
+
+
+@dataclass
+class PendingRequest:
+    """A request waiting for its response."""
+
+    unit: int
+    function_code: int
+    future: asyncio.Future
+
+
+class VictronPipelinedClient:
+    """Modbus TCP client with up to ``depth`` outstanding requests.
+
+    Responses are matched to their requests by transaction id, so a poll of
+    N reads costs about one round trip instead of N. When the server answers
+    with a transaction id, unit or function that does not match an
+    outstanding request, or a request times out while others were
+    outstanding, the client falls back to stop-and-wait (one request at a
+    time) for the rest of its life. A request that timed out that way is
+    sent once more.
+    """
+
+    def __init__(
+        self, host: str, port: int, depth: int = 4, timeout: float = 3.0
+    ) -> None:
+        """Initialize the client."""
+        self.host = host
+        self.port = port
+        self.depth = max(depth, 1)
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._read_task: asyncio.Task | None = None
+        self._pending: dict[int, PendingRequest] = {}
+        self._transaction = 0
+        self._outstanding = 0
+        self._window: asyncio.Condition | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the socket is open."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> bool:
+        """Open the socket."""
+        if self.connected:
+            return True
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        except (OSError, TimeoutError) as e:
+            _LOGGER.debug("connecting to %s:%s failed: %s", self.host, self.port, e)
+            return False
+        self._window = asyncio.Condition()
+        self._read_task = asyncio.get_running_loop().create_task(
+            self._read_responses(self._reader)
+        )
+        return True
+
+    def close(self) -> None:
+        """Close the socket and fail the outstanding requests."""
+        if self._read_task is not None:
+            self._read_task.cancel()
+            self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._fail_pending(ConnectionException("connection closed"))
+
+    async def read_holding_registers(
+        self, address: int, count: int, device_id: int
+    ) -> PipelinedResponse:
+        """Read holding registers."""
+        return await self._request(
+            device_id,
+            READ_HOLDING_REGISTERS,
+            struct.pack(">BHH", READ_HOLDING_REGISTERS, address, count),
+        )
+
+    async def write_register(
+        self, address: int, value: int, device_id: int
+    ) -> PipelinedResponse:
+        """Write a single register."""
+        return await self._request(
+            device_id,
+            WRITE_SINGLE_REGISTER,
+            struct.pack(">BHH", WRITE_SINGLE_REGISTER, address, value & 0xFFFF),
+        )
+
+    async def _request(
+        self, unit: int, function_code: int, pdu: bytes, retry: bool = True
+    ) -> PipelinedResponse:
+        if not self.connected:
+            raise ConnectionException(f"not connected to {self.host}:{self.port}")
+        window = self._window
+        async with window:
+            await window.wait_for(lambda: self._outstanding < self.depth)
+            self._outstanding += 1
+        pipelined = self.depth > 1
+        self._transaction = (self._transaction + 1) & 0xFFFF
+        transaction = self._transaction
+        future = asyncio.get_running_loop().create_future()
+        self._pending[transaction] = PendingRequest(unit, function_code, future)
+        try:
+            # the connection can be lost while waiting for a free slot
+            if not self.connected:
+                raise ConnectionException(f"not connected to {self.host}:{self.port}")
+            self._writer.write(
+                MBAP_HEADER.pack(transaction, 0, len(pdu) + 1, unit) + pdu
+            )
+            return await asyncio.wait_for(future, self.timeout)
+        except TimeoutError:
+            if pipelined and retry:
+                self._degrade(f"request {transaction} timed out")
+            else:
+                raise ModbusIOException(
+                    f"no response to request {transaction} for unit {unit}"
+                ) from None
+        finally:
+            self._pending.pop(transaction, None)
+            async with window:
+                self._outstanding -= 1
+                window.notify_all()
+        return await self._request(unit, function_code, pdu, retry=False)
+
+    async def _read_responses(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                transaction, _, length, unit = MBAP_HEADER.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                pending = self._pending.get(transaction)
+                if (
+                    pending is None
+                    or pending.unit != unit
+                    or pending.function_code != pdu[0] & 0x7F
+                ):
+                    self._degrade(f"unexpected response {transaction} for unit {unit}")
+                    continue
+                if not pending.future.done():
+                    pending.future.set_result(self._decode(pdu))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            _LOGGER.debug("connection to %s:%s lost: %s", self.host, self.port, e)
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._fail_pending(ConnectionException("connection lost"))
+
+    @staticmethod
+    def _decode(pdu: bytes) -> PipelinedResponse:
+        function_code = pdu[0]
+        if function_code & 0x80:
+            return PipelinedResponse(function_code & 0x7F, exception_code=pdu[1])
+        if function_code == READ_HOLDING_REGISTERS:
+            count = pdu[1] // 2
+            return PipelinedResponse(
+                function_code, list(struct.unpack_from(f">{count}H", pdu, 2))
+            )
+        return PipelinedResponse(function_code)
+
+    def _degrade(self, reason: str) -> None:
+        if self.depth > 1:
+            _LOGGER.warning(
+                "%s:%s does not handle pipelined requests (%s), falling back to one request at a time",
+                self.host,
+                self.port,
+                reason,
+            )
+            self.depth = 1
+
+    def _fail_pending(self, error: Exception) -> None:
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_exception(error)
@@ -0,0 +1,153 @@
+"""Plan coalesced Modbus reads for Victron register sets."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cache
+import logging
+
+from .codec import word_count
+from .const import (
+    FAST_POLL_UNITS,
+    INVALID_REGISTERS,
+    MODBUS_MAX_READ_COUNT,
+    READ_PLAN_MAX_GAP,
+    SLOW_POLL_REGISTER_SETS,
+    PollTier,
+    RegisterInfo,
+    register_info_dict,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ReadBlock:
+    """A single read holding registers request covering one or more register sets."""
+
+    address: int
+    count: int
+    # (register set name, offset of the set within the block)
+    register_sets: tuple[tuple[str, int], ...]
+
+    def split(self) -> list[ReadBlock]:
+        """Return one block per register set."""
+        return [plan_single_read(name) for name, _ in self.register_sets]
+
+
+def register_set_span(registerInfo: dict[str, RegisterInfo]) -> tuple[int, int]:
+    """Return the first register and register count of a register set."""
+    first = next(iter(registerInfo.values()))
+    last = next(reversed(registerInfo.values()))
+    return first.register, last.register - first.register + word_count(last.dataType)
+
+
+def plan_single_read(name: str) -> ReadBlock:
+    """Return the read block for a single register set."""
+    address, count = register_set_span(register_info_dict[name])
+    return ReadBlock(address, count, ((name, 0),))
+
+
+@cache
+def sentinel_read(name: str) -> tuple[int, int]:
+    """Return the address and count of a minimal read probing a register set.
+
+    The sentinel is the first valid register of the set, read with at most
+    two words, so a missing set is found without reading its whole span.
+    """
+    for registerInfo in register_info_dict[name].values():
+        if registerInfo.register in INVALID_REGISTERS:
+            continue
+        return registerInfo.register, min(word_count(registerInfo.dataType), 2)
+    return register_set_span(register_info_dict[name])[0], 1
+
+
+def register_set_family(name: str) -> str:
+    """Return the device class a register set belongs to, e.g. "battery"."""
+    return name.split("_", 1)[0]
+
+
+@cache
+def family_anchors() -> dict[str, str]:
+    """Return the register set identifying each device class.
+
+    That is the set holding the product id of the class if there is one,
+    else its main "<class>_registers" set, else its first set.
+    """
+    anchors: dict[str, str] = {}
+    for name in register_info_dict:
+        anchors.setdefault(register_set_family(name), name)
+    for name in register_info_dict:
+        if name == f"{register_set_family(name)}_registers":
+            anchors[register_set_family(name)] = name
+    for name, registerInfo in register_info_dict.items():
+        if any(key.endswith("productid") for key in registerInfo):
+            anchors[register_set_family(name)] = name
+    return anchors
+
+
+def is_family_anchor(name: str) -> bool:
+    """Return True if a register set identifies its device class."""
+    return family_anchors()[register_set_family(name)] == name
+
+
+def plan_reads(
+    names,
+    max_gap: int = READ_PLAN_MAX_GAP,
+    max_count: int = MODBUS_MAX_READ_COUNT,
+) -> list[ReadBlock]:
+    """Compute the fewest reads that cover the given register sets.
+
+    Sets are merged when the gap between them is at most ``max_gap`` registers,
+    the gap holds no known invalid register and the merged read stays within
+    ``max_count`` registers.
+    """
+    spans = sorted(
+        (*register_set_span(register_info_dict[name]), name) for name in names
+    )
+
+    blocks: list[ReadBlock] = []
+    start = end = None
+    members: list[tuple[str, int]] = []
+    for address, count, name in spans:
+        if start is not None:
+            gap = address - end
+            new_end = max(end, address + count)
+            if (
+                gap <= max_gap
+                and new_end - start <= max_count
+                and INVALID_REGISTERS.isdisjoint(range(end, address))
+            ):
+                members.append((name, address - start))
+                end = new_end
+                continue
+            blocks.append(ReadBlock(start, end - start, tuple(members)))
+        start, end, members = address, address + count, [(name, 0)]
+
+    if start is not None:
+        blocks.append(ReadBlock(start, end - start, tuple(members)))
+    return blocks
+
+
+def determine_poll_tier(name: str, overrides: dict | None = None) -> PollTier:
+    """Determine how often a register set needs to be read."""
+    if overrides and name in overrides:
+        try:
+            return PollTier(overrides[name])
+        except ValueError:
+            _LOGGER.warning(
+                "Ignoring poll tier %s of %s, expected one of %s",
+                overrides[name],
+                name,
+                [tier.value for tier in PollTier],
+            )
+    if "productid" in name:
+        return PollTier.ONCE
+    if name.startswith("settings") or name in SLOW_POLL_REGISTER_SETS:
+        return PollTier.SLOW
+    if any(
+        registerInfo.unit in FAST_POLL_UNITS
+        for registerInfo in register_info_dict[name].values()
+    ):
+        return PollTier.FAST
+    return PollTier.NORMAL
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import timedelta
 from enum import Enum
@@ -13,14 +14,18 @@ from homeassistant.components.select import (
     SelectEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HassJob, HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import HassJob, HomeAssistant, callback
 from homeassistant.helpers import entity, event
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import utcnow
 
-from .base import VictronWriteBaseEntityDescription
-from .const import CONF_ADVANCED_OPTIONS, DOMAIN, SelectWriteType, register_info_dict
+from .base import (
+    VictronCoordinatorEntity,
+    VictronWriteBaseEntityDescription,
+    async_listen_new_register_sets,
+)
+from .const import DOMAIN
 from .coordinator import victronEnergyDeviceUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -36,39 +41,36 @@ async def async_setup_entry(
         config_entry.entry_id
     ]
     _LOGGER.debug("attempting to setup select entities")
-    descriptions = []
-    # TODO cleanup
-    if config_entry.options[CONF_ADVANCED_OPTIONS]:
-        register_set = victron_coordinator.processed_data()["register_set"]
-        for slave, registerLedger in register_set.items():
-            for name in registerLedger:
-                for register_name, registerInfo in register_info_dict[name].items():
-                    if isinstance(registerInfo.entityType, SelectWriteType):
-                        _LOGGER.debug(
-                            "unit == %s registerLedger == %s registerInfo",
-                            slave,
-                            registerLedger,
-                        )
-
-                        description = VictronEntityDescription(
-                            key=register_name,
-                            name=register_name.replace("_", " "),
-                            slave=slave,
-                            options=registerInfo.entityType.options,
-                            address=registerInfo.register,
-                        )
-
-                        descriptions.append(description)
-                        _LOGGER.debug("composed description == %s", description)
-
-    entities = []
-    entity = {}
-    for description in descriptions:
-        entity = description
-        entities.append(VictronSelect(hass, victron_coordinator, entity))
-    _LOGGER.debug("adding selects")
-    _LOGGER.debug(entities)
-    async_add_entities(entities)
+
+    @callback
+    def async_add_register_sets(register_set: dict) -> None:
+        """Add the entities of the given register sets."""
+        descriptions = []
+        for entry in victron_coordinator.entity_catalog.entries(
+            Platform.SELECT, register_set
+        ):
+            registerInfo = entry.register_info
+            description = VictronEntityDescription(
+                key=entry.key,
+                name=entry.key.replace("_", " "),
+                slave=entry.unit,
+                options=registerInfo.entityType.options,
+                labels=registerInfo.entityType.labels,
+                address=registerInfo.register,
+            )
+            descriptions.append(description)
+
+        entities = []
+        entity = {}
+        for description in descriptions:
+            entity = description
+            entities.append(VictronSelect(hass, victron_coordinator, entity))
+        _LOGGER.debug("adding selects")
+        _LOGGER.debug(entities)
+        async_add_entities(entities)
+
+    async_add_register_sets(victron_coordinator.processed_data()["register_set"])
+    async_listen_new_register_sets(hass, config_entry, async_add_register_sets)
 
 
 @dataclass
@@ -78,9 +80,10 @@ class VictronEntityDescription(
     """Describes victron sensor entity."""
 
     options: Enum = None
+    labels: Mapping[int, str] = None
 
 
-class VictronSelect(CoordinatorEntity, SelectEntity):
+class VictronSelect(VictronCoordinatorEntity, SelectEntity):
     """Representation of a Victron switch."""
 
     description: VictronEntityDescription
@@ -98,6 +101,7 @@ class VictronSelect(CoordinatorEntity, SelectEntity):
         self.description: VictronEntityDescription = description
         # this needs to be changed to allow multiple of the same type
         self._attr_name = f"{description.name}"
+        self.init_data_access(coordinator, description)
 
         self._attr_unique_id = f"{self.description.slave}_{self.description.key}"
         if self.description.slave not in (100, 225):
@@ -113,11 +117,7 @@ class VictronSelect(CoordinatorEntity, SelectEntity):
         """Get the latest data and updates the states."""
         _LOGGER.debug("select_async_update")
         try:
-            self._attr_native_value = self.description.value_fn(
-                self.coordinator.processed_data(),
-                self.description.slave,
-                self.description.key,
-            )
+            self._attr_native_value = self.value
         except (TypeError, IndexError):
             _LOGGER.debug("failed to retrieve value")
             # No data available
@@ -138,36 +138,25 @@ class VictronSelect(CoordinatorEntity, SelectEntity):
     @property
     def current_option(self) -> str:
         """Return the currently selected option."""
-        return self.description.options(
-            self.description.value_fn(
-                self.coordinator.processed_data(),
-                self.description.slave,
-                self.description.key,
-            )
-        ).name
+        return self.description.labels.get(self.value)
 
     @property
     def options(self) -> list:
         """Return a list of available options."""
-        return [option.name for option in self.description.options]
+        return list(self.description.labels.values())
 
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
-        self.coordinator.write_register(
+        await self.coordinator.async_write_register(
             unit=self.description.slave,
             address=self.description.address,
             value=self.coordinator.encode_scaling(
                 int(self.description.options[option].value), "", 0
             ),
         )
+        await self.coordinator.async_read_back(self.data_key)
 
     # TODO extract these type of property definitions to base class
-    @property
-    def available(self) -> bool:
-        """Return True if entity available."""
-        full_key = str(self.description.slave) + "." + self.description.key
-        return self.coordinator.processed_data()["availability"][full_key]
-
     @property
     def device_info(self) -> entity.DeviceInfo:
         """Return the device info."""
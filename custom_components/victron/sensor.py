@@ -1,6 +1,7 @@
 """Support for Victron energy sensors."""
 
 from dataclasses import dataclass
+from functools import cache
 import logging
 
 from homeassistant.components.sensor import (
@@ -12,6 +13,7 @@ from homeassistant.components.sensor import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     PERCENTAGE,
+    Platform,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
     UnitOfEnergy,
@@ -26,17 +28,13 @@ from homeassistant.const import (
 from homeassistant.core import HassJob, HomeAssistant, callback
 from homeassistant.helpers import entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-
-from .base import VictronBaseEntityDescription
-from .const import (
-    CONF_ADVANCED_OPTIONS,
-    DOMAIN,
-    BoolReadEntityType,
-    ReadEntityType,
-    TextReadEntityType,
-    register_info_dict,
+
+from .base import (
+    VictronBaseEntityDescription,
+    VictronCoordinatorEntity,
+    async_listen_new_register_sets,
 )
+from .const import DOMAIN, ReadEntityType, TextReadEntityType
 from .coordinator import victronEnergyDeviceUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -54,82 +52,81 @@ async def async_setup_entry(
     ]
     _LOGGER.debug(victron_coordinator.processed_data()["register_set"])
     _LOGGER.debug(victron_coordinator.processed_data()["data"])
-    descriptions = []
-    # TODO cleanup
-    register_set = victron_coordinator.processed_data()["register_set"]
-    for slave, registerLedger in register_set.items():
-        for name in registerLedger:
-            for register_name, registerInfo in register_info_dict[name].items():
-                _LOGGER.debug(
-                    "unit == %s registerLedger == %s registerInfo",
-                    slave,
-                    registerLedger,
-                )
-                if config_entry.options[CONF_ADVANCED_OPTIONS]:
-                    if not isinstance(
-                        registerInfo.entityType, ReadEntityType
-                    ) or isinstance(registerInfo.entityType, BoolReadEntityType):
-                        continue
-
-                description = VictronEntityDescription(
-                    key=register_name,
-                    name=register_name.replace("_", " "),
-                    native_unit_of_measurement=registerInfo.unit,
-                    state_class=registerInfo.determine_stateclass(),
-                    slave=slave,
-                    device_class=determine_victron_device_class(
-                        register_name, registerInfo.unit
-                    ),
-                    entity_type=registerInfo.entityType
-                    if isinstance(registerInfo.entityType, TextReadEntityType)
-                    else None,
-                )
-                _LOGGER.debug("composed description == %s", description)
-
-                descriptions.append(description)
-
-    entities = []
-    entity = {}
-    for description in descriptions:
-        entity = description
-        entities.append(VictronSensor(victron_coordinator, entity))
-
-    # Add an entity for each sensor type
-    async_add_entities(entities, True)
-
 
+    @callback
+    def async_add_register_sets(
+        register_set: dict, update_before_add: bool = False
+    ) -> None:
+        """Add the entities of the given register sets."""
+        descriptions = []
+        for entry in victron_coordinator.entity_catalog.entries(
+            Platform.SENSOR, register_set
+        ):
+            registerInfo = entry.register_info
+            description = VictronEntityDescription(
+                key=entry.key,
+                name=entry.key.replace("_", " "),
+                native_unit_of_measurement=registerInfo.unit,
+                state_class=registerInfo.determine_stateclass(),
+                slave=entry.unit,
+                device_class=determine_victron_device_class(
+                    entry.key, registerInfo.unit
+                ),
+                entity_type=registerInfo.entityType
+                if isinstance(registerInfo.entityType, TextReadEntityType)
+                else None,
+            )
+            descriptions.append(description)
+
+        entities = []
+        entity = {}
+        for description in descriptions:
+            entity = description
+            entities.append(VictronSensor(victron_coordinator, entity))
+
+        # Add an entity for each sensor type
+        async_add_entities(entities, update_before_add)
+
+    async_add_register_sets(victron_coordinator.processed_data()["register_set"], True)
+    async_listen_new_register_sets(hass, config_entry, async_add_register_sets)
+
+
+def _unit_device_classes() -> dict[str, SensorDeviceClass]:
+    """Map every unit of measurement to the device class it implies."""
+    table = {}
+    for units, device_class in (
+        (UnitOfPower, SensorDeviceClass.POWER),
+        (UnitOfEnergy, SensorDeviceClass.ENERGY),
+        ((UnitOfFrequency.HERTZ,), SensorDeviceClass.FREQUENCY),
+        ((UnitOfTime.SECONDS,), SensorDeviceClass.DURATION),
+        (UnitOfTemperature, SensorDeviceClass.TEMPERATURE),
+        # Perhaps change this to water if only water is measured in volume units
+        (UnitOfVolume, SensorDeviceClass.VOLUME_STORAGE),
+        (UnitOfSpeed, SensorDeviceClass.SPEED),
+        (UnitOfPressure, SensorDeviceClass.PRESSURE),
+        ((UnitOfElectricPotential.VOLT,), SensorDeviceClass.VOLTAGE),
+        ((UnitOfElectricCurrent.AMPERE,), SensorDeviceClass.CURRENT),
+    ):
+        for unit in units:
+            # the first match wins, like the checks this table replaces
+            table.setdefault(unit.value, device_class)
+    return table
+
+
+UNIT_DEVICE_CLASSES = _unit_device_classes()
+
+
+@cache
 def determine_victron_device_class(name, unit):
     """Determine the device class of a sensor based on its name and unit."""
-    if unit == PERCENTAGE and "soc" in name:
-        return SensorDeviceClass.BATTERY
     if unit == PERCENTAGE:
+        if "soc" in name:
+            return SensorDeviceClass.BATTERY
         return None  # Device classes aren't supported for voltage deviation and other % based entities that do not report SOC, moisture or humidity
-    if unit in [member.value for member in UnitOfPower]:
-        return SensorDeviceClass.POWER
-    if unit in [member.value for member in UnitOfEnergy]:
-        _LOGGER.debug("unit of energy")
-        return SensorDeviceClass.ENERGY
-    if unit == UnitOfFrequency.HERTZ:
-        return SensorDeviceClass.FREQUENCY
-    if unit == UnitOfTime.SECONDS:
-        return SensorDeviceClass.DURATION
-    if unit in [member.value for member in UnitOfTemperature]:
-        return SensorDeviceClass.TEMPERATURE
-    if unit in [member.value for member in UnitOfVolume]:
-        return (
-            SensorDeviceClass.VOLUME_STORAGE
-        )  # Perhaps change this to water if only water is measured in volume units
-    if unit in [member.value for member in UnitOfSpeed]:
-        if "meteo" in name:
-            return SensorDeviceClass.WIND_SPEED
-        return SensorDeviceClass.SPEED
-    if unit in [member.value for member in UnitOfPressure]:
-        return SensorDeviceClass.PRESSURE
-    if unit == UnitOfElectricPotential.VOLT:
-        return SensorDeviceClass.VOLTAGE
-    if unit == UnitOfElectricCurrent.AMPERE:
-        return SensorDeviceClass.CURRENT
-    return None
+    device_class = UNIT_DEVICE_CLASSES.get(unit)
+    if device_class is SensorDeviceClass.SPEED and "meteo" in name:
+        return SensorDeviceClass.WIND_SPEED
+    return device_class
 
 
 @dataclass
@@ -139,7 +136,7 @@ class VictronEntityDescription(SensorEntityDescription, VictronBaseEntityDescrip
     entity_type: ReadEntityType = None
 
 
-class VictronSensor(CoordinatorEntity, SensorEntity):
+class VictronSensor(VictronCoordinatorEntity, SensorEntity):
     """Representation of a Victron energy sensor."""
 
     def __init__(
@@ -154,6 +151,7 @@ class VictronSensor(CoordinatorEntity, SensorEntity):
         self._attr_native_unit_of_measurement = description.native_unit_of_measurement
         self._attr_state_class = description.state_class
         self.entity_type = description.entity_type
+        self.init_data_access(coordinator, description)
 
         self._attr_unique_id = f"{description.slave}_{self.description.key}"
         if description.slave not in (0, 100, 225):
@@ -168,44 +166,47 @@ class VictronSensor(CoordinatorEntity, SensorEntity):
 
         super().__init__(coordinator)
 
+    async def async_added_to_hass(self) -> None:
+        """Set the initial value before the first state write."""
+        await super().async_added_to_hass()
+        try:
+            self._update_native_value()
+        except (TypeError, IndexError):
+            _LOGGER.debug("failed to retrieve value")
+            # No data available
+            self._attr_native_value = None
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Get the latest data and updates the states."""
         try:
-            if self.available:
-                data = self.description.value_fn(
-                    self.coordinator.processed_data(),
-                    self.description.slave,
-                    self.description.key,
-                )
-                if self.entity_type is not None and isinstance(
-                    self.entity_type, TextReadEntityType
-                ):
-                    if data in {item.value for item in self.entity_type.decodeEnum}:
-                        self._attr_native_value = self.entity_type.decodeEnum(
-                            data
-                        ).name.split("_DUPLICATE")[0]
-                    else:
-                        self._attr_native_value = "NONDECODABLE"
-                        _LOGGER.error(
-                            "The reported value %s for entity %s isn't a decodable value. Please report this error to the integrations maintainer",
-                            data,
-                            self._attr_name,
-                        )
-                else:
-                    self._attr_native_value = data
-
-            self.async_write_ha_state()
+            self._update_native_value()
         except (TypeError, IndexError):
             _LOGGER.debug("failed to retrieve value")
             # No data available
             self._attr_native_value = None
-
-    @property
-    def available(self) -> bool:
-        """Return True if entity is available."""
-        full_key = str(self.description.slave) + "." + self.description.key
-        return self.coordinator.processed_data()["availability"][full_key]
+            return
+        super()._handle_coordinator_update()
+
+    def _update_native_value(self) -> None:
+        """Decode the current value from the coordinator data."""
+        if self.available:
+            data = self.value
+            if self.entity_type is not None and isinstance(
+                self.entity_type, TextReadEntityType
+            ):
+                label = self.entity_type.labels.get(data)
+                if label is not None:
+                    self._attr_native_value = label
+                else:
+                    self._attr_native_value = "NONDECODABLE"
+                    _LOGGER.error(
+                        "The reported value %s for entity %s isn't a decodable value. Please report this error to the integrations maintainer",
+                        data,
+                        self._attr_name,
+                    )
+            else:
+                self._attr_native_value = data
 
     @property
     def device_info(self) -> entity.DeviceInfo:
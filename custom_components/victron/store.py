@@ -0,0 +1,118 @@
+"""Compact storage of decoded register values."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator, Mapping
+import time
+
+from .decoder import decode_plan
+
+
+class VictronValueStore:
+    """Array backed store of the values, availability and update times of registers.
+
+    Every "<unit>.<register>" key gets a fixed slot when its register set is
+    added. The arrays only ever grow, so slots stay valid for the lifetime of
+    the store and entities can hold on to them.
+    """
+
+    def __init__(self, decodeInfo: dict | None = None) -> None:
+        """Initialize the store with the slots of the given register sets."""
+        self.index: dict[str, int] = {}
+        self.keys: list[str] = []
+        self.values: list = []
+        self.available = bytearray()
+        self.updated = array("d")
+        # (unit, register set) a key is read with
+        self.register_sets: dict[str, tuple[int, str]] = {}
+        self._slots: dict[tuple[int, str], tuple[int, ...]] = {}
+        self.data_view = StoreView(self.index, self.values)
+        self.availability_view = StoreView(self.index, self.available, bool)
+        for unit, names in (decodeInfo or {}).items():
+            self.add_register_sets(unit, names)
+
+    def add_register_sets(self, unit, names) -> None:
+        """Allocate slots for all registers of the given register sets of a unit."""
+        for name in names:
+            slots = []
+            for key in decode_plan(name, unit).keys:
+                slot = self.index.get(key)
+                if slot is None:
+                    slot = self.index[key] = self._allocate(key)
+                else:
+                    self._release(key, slot)
+                self.register_sets[key] = (unit, name)
+                slots.append(slot)
+            self._slots[(unit, name)] = tuple(slots)
+
+    def _allocate(self, key: str) -> int:
+        """Append a slot for key and return it."""
+        self.keys.append(key)
+        self.values.append(None)
+        self.available.append(0)
+        self.updated.append(0.0)
+        return len(self.values) - 1
+
+    def _release(self, key: str, slot: int) -> None:
+        """Hand the slot of a key read by several register sets to the last one.
+
+        The set that owned it so far decodes into a slot of its own that is
+        not part of the index, so its value can no longer overwrite the one
+        of the last set (like the last set won when merging the sets).
+        """
+        owner = self.register_sets[key]
+        owner_slots = self._slots.get(owner)
+        if owner_slots is None:
+            return
+        shadow = self._allocate(key)
+        self._slots[owner] = tuple(
+            shadow if owned == slot else owned for owned in owner_slots
+        )
+
+    def slots(self, unit, name: str) -> tuple[int, ...]:
+        """Return the slots of the registers of a register set of a unit."""
+        return self._slots[(unit, name)]
+
+    def set_value(self, key: str, value) -> None:
+        """Set the value of a single key."""
+        slot = self.index[key]
+        self.values[slot] = value
+        self.updated[slot] = time.time()
+
+    def set_available(self, slots, available: bool, changed: set[str]) -> None:
+        """Set the availability of slots, adding the keys that flipped to changed."""
+        flag = int(available)
+        for slot in slots:
+            if self.available[slot] != flag:
+                self.available[slot] = flag
+                changed.add(self.keys[slot])
+
+    def touch(self, slots) -> None:
+        """Record that the given slots were just read."""
+        now = time.time()
+        for slot in slots:
+            self.updated[slot] = now
+
+
+class StoreView(Mapping):
+    """Read-only mapping view of one of the arrays of a VictronValueStore."""
+
+    def __init__(self, index: dict[str, int], values, convert=None) -> None:
+        """Initialize the view."""
+        self._index = index
+        self._values = values
+        self._convert = convert
+
+    def __getitem__(self, key: str):
+        """Return the value of a key."""
+        value = self._values[self._index[key]]
+        return self._convert(value) if self._convert else value
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys."""
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        """Return the number of keys."""
+        return len(self._index)
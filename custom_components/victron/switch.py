@@ -12,13 +12,17 @@ from homeassistant.components.switch import (
     SwitchEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HassJob, HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import HassJob, HomeAssistant, callback
 from homeassistant.helpers import entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .base import VictronWriteBaseEntityDescription
-from .const import CONF_ADVANCED_OPTIONS, DOMAIN, SwitchWriteType, register_info_dict
+from .base import (
+    VictronCoordinatorEntity,
+    VictronWriteBaseEntityDescription,
+    async_listen_new_register_sets,
+)
+from .const import DOMAIN
 from .coordinator import victronEnergyDeviceUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -34,38 +38,33 @@ async def async_setup_entry(
         config_entry.entry_id
     ]
     _LOGGER.debug("attempting to setup switch entities")
-    descriptions = []
-    # TODO cleanup
-    if config_entry.options[CONF_ADVANCED_OPTIONS]:
-        register_set = victron_coordinator.processed_data()["register_set"]
-        for slave, registerLedger in register_set.items():
-            for name in registerLedger:
-                for register_name, registerInfo in register_info_dict[name].items():
-                    _LOGGER.debug(
-                        "unit == %s registerLedger == %s registerInfo == %s",
-                        slave,
-                        registerLedger,
-                        registerInfo,
-                    )
-
-                    if isinstance(registerInfo.entityType, SwitchWriteType):
-                        description = VictronEntityDescription(
-                            key=register_name,
-                            name=register_name.replace("_", " "),
-                            slave=slave,
-                            address=registerInfo.register,
-                        )
-                        descriptions.append(description)
-                        _LOGGER.debug("composed description == %s", description)
-
-    entities = []
-    entity = {}
-    for description in descriptions:
-        entity = description
-        entities.append(VictronSwitch(hass, victron_coordinator, entity))
-    _LOGGER.debug("adding switches")
-    _LOGGER.debug(entities)
-    async_add_entities(entities)
+
+    @callback
+    def async_add_register_sets(register_set: dict) -> None:
+        """Add the entities of the given register sets."""
+        descriptions = []
+        for entry in victron_coordinator.entity_catalog.entries(
+            Platform.SWITCH, register_set
+        ):
+            description = VictronEntityDescription(
+                key=entry.key,
+                name=entry.key.replace("_", " "),
+                slave=entry.unit,
+                address=entry.register_info.register,
+            )
+            descriptions.append(description)
+
+        entities = []
+        entity = {}
+        for description in descriptions:
+            entity = description
+            entities.append(VictronSwitch(hass, victron_coordinator, entity))
+        _LOGGER.debug("adding switches")
+        _LOGGER.debug(entities)
+        async_add_entities(entities)
+
+    async_add_register_sets(victron_coordinator.processed_data()["register_set"])
+    async_listen_new_register_sets(hass, config_entry, async_add_register_sets)
 
 
 @dataclass
@@ -75,7 +74,7 @@ class VictronEntityDescription(
     """Describes victron sensor entity."""
 
 
-class VictronSwitch(CoordinatorEntity, SwitchEntity):
+class VictronSwitch(VictronCoordinatorEntity, SwitchEntity):
     """Representation of a Victron switch."""
 
     def __init__(
@@ -88,7 +87,7 @@ class VictronSwitch(CoordinatorEntity, SwitchEntity):
         self.coordinator = coordinator
         self.description: VictronEntityDescription = description
         self._attr_name = f"{description.name}"
-        self.data_key = str(self.description.slave) + "." + str(self.description.key)
+        self.init_data_access(coordinator, description)
 
         self._attr_unique_id = f"{description.slave}_{self.description.key}"
         if description.slave not in (100, 225):
@@ -104,14 +103,14 @@ class VictronSwitch(CoordinatorEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on the device."""
-        self.coordinator.write_register(
+        await self.coordinator.async_write_register(
             unit=self.description.slave, address=self.description.address, value=1
         )
         await self.coordinator.async_update_local_entry(self.data_key, 1)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off the device."""
-        self.coordinator.write_register(
+        await self.coordinator.async_write_register(
             unit=self.description.slave, address=self.description.address, value=0
         )
         await self.coordinator.async_update_local_entry(self.data_key, 0)
@@ -119,19 +118,9 @@ class VictronSwitch(CoordinatorEntity, SwitchEntity):
     @property
     def is_on(self) -> bool:
         """Return true if switch is on."""
-        data = self.description.value_fn(
-            self.coordinator.processed_data(),
-            self.description.slave,
-            self.description.key,
-        )
+        data = self.value
         return cast("bool", data)
 
-    @property
-    def available(self) -> bool:
-        """Return True if entity is available."""
-        full_key = str(self.description.slave) + "." + self.description.key
-        return self.coordinator.processed_data()["availability"][full_key]
-
     @property
     def device_info(self) -> entity.DeviceInfo:
         """Return the device info."""
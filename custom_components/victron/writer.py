@@ -0,0 +1,226 @@
+"""Queue of register writes to the GX device."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import logging
+
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class VictronWriteError(HomeAssistantError):
+    """Error raised when a register write failed."""
+
+
+@dataclass
+class WriteStats:
+    """Counters of the writes handled by the queue."""
+
+    queued: int = 0
+    written: int = 0
+    failed: int = 0
+    # writes that were replaced by a later value before they were sent
+    coalesced: int = 0
+
+
+@dataclass
+class PendingWrite:
+    """A register write waiting in the queue."""
+
+    unit: int
+    address: int
+    value: int
+    future: asyncio.Future
+
+
+class VictronWriteQueue:
+    """Serialize register writes without blocking the event loop.
+
+    Writes are sent one at a time in the order they were queued by a single
+    worker task. ``write`` has to hold the same lock as the polling reads of
+    the hub, so a write never interleaves with a read on the connection.
+    Every caller awaits the outcome of its own write. Once stopped the queue
+    refuses new writes.
+    """
+
+    def __init__(self, write: Callable[[int, int, int], Awaitable[object]]) -> None:
+        """Initialize the queue."""
+        self._write = write
+        self._queue: asyncio.Queue[PendingWrite] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        self._current: PendingWrite | None = None
+        self.stopped = False
+        self.stats = WriteStats()
+
+    async def async_write(self, unit, address, value) -> None:
+        """Queue a write and wait until it was acknowledged by the device."""
+        if self.stopped:
+            raise VictronWriteError("Connection to the GX device was closed")
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(
+                self._async_process(), name="victron register writer"
+            )
+        future = asyncio.get_running_loop().create_future()
+        self.stats.queued += 1
+        self._queue.put_nowait(PendingWrite(unit, address, value, future))
+        await future
+
+    async def _async_process(self) -> None:
+        """Send the queued writes until cancelled."""
+        while True:
+            pending = await self._queue.get()
+            self._current = pending
+            try:
+                if pending.future.done():
+                    # the caller went away
+                    continue
+                try:
+                    response = await self._write(
+                        pending.unit, pending.address, pending.value
+                    )
+                except Exception as e:  # noqa: BLE001
+                    # any error has to reach the caller, a dead worker would
+                    # leave every later write waiting forever
+                    self._fail(pending, str(e) or type(e).__name__)
+                    continue
+                if response is None or response.isError():
+                    self._fail(pending, str(response))
+                    continue
+                self.stats.written += 1
+                if not pending.future.done():
+                    pending.future.set_result(None)
+            finally:
+                self._current = None
+                self._queue.task_done()
+
+    def _fail(self, pending: PendingWrite, reason: str) -> None:
+        self.stats.failed += 1
+        _LOGGER.warning(
+            "Writing %s to register %s of unit %s failed: %s",
+            pending.value,
+            pending.address,
+            pending.unit,
+            reason,
+        )
+        if not pending.future.done():
+            pending.future.set_exception(
+                VictronWriteError(
+                    f"Writing register {pending.address} of unit {pending.unit} failed"
+                )
+            )
+
+    def stop(self) -> None:
+        """Stop the worker and fail the writes that were not sent yet."""
+        self.stopped = True
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        unsent = [self._current] if self._current is not None else []
+        while not self._queue.empty():
+            unsent.append(self._queue.get_nowait())
+        self._current = None
+        for pending in unsent:
+            if not pending.future.done():
+                pending.future.set_exception(
+                    VictronWriteError("Connection to the GX device was closed")
+                )
+
+
+@dataclass
+class CoalescedWrite:
+    """The latest value of a register waiting for the coalescing window to end."""
+
+    value: int
+    futures: list[asyncio.Future]
+    handle: asyncio.TimerHandle | None = None
+
+
+class VictronWriteCoalescer:
+    """Collapse bursts of writes to the same register into the last value.
+
+    The first write to a (unit, address) opens a window of ``window``
+    seconds, writes to the same register within the window replace its
+    value. When the window ends only the last value is queued, every caller
+    of the burst gets the outcome of that write and learns whether its own
+    value was the one written.
+    """
+
+    def __init__(self, queue: VictronWriteQueue, window: float) -> None:
+        """Initialize the coalescer."""
+        self._queue = queue
+        self.window = window
+        self.stats = queue.stats
+        self._pending: dict[tuple[int, int], CoalescedWrite] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def async_write(self, unit, address, value) -> bool:
+        """Write the register once the coalescing window of the burst ended.
+
+        Returns False if the value was replaced by a later write of the burst.
+        """
+        if self.window <= 0 or self._queue.stopped:
+            await self._queue.async_write(unit, address, value)
+            return True
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.get((unit, address))
+        if pending is None:
+            pending = self._pending[(unit, address)] = CoalescedWrite(value, [future])
+            pending.handle = loop.call_later(self.window, self._flush, unit, address)
+        else:
+            self.stats.coalesced += 1
+            pending.value = value
+            pending.futures.append(future)
+        return await future
+
+    def _flush(self, unit, address) -> None:
+        pending = self._pending.pop((unit, address))
+        if len(pending.futures) > 1:
+            _LOGGER.debug(
+                "Coalesced %s writes to register %s of unit %s into one, %s so far",
+                len(pending.futures),
+                address,
+                unit,
+                self.stats.coalesced,
+            )
+        task = asyncio.get_running_loop().create_task(
+            self._async_send(unit, address, pending)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _async_send(self, unit, address, pending: CoalescedWrite) -> None:
+        try:
+            await self._queue.async_write(unit, address, pending.value)
+        except asyncio.CancelledError:
+            for future in pending.futures:
+                if not future.done():
+                    future.set_exception(
+                        VictronWriteError("Connection to the GX device was closed")
+                    )
+            raise
+        except VictronWriteError as e:
+            for future in pending.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in pending.futures:
+                if not future.done():
+                    future.set_result(future is pending.futures[-1])
+
+    def stop(self) -> None:
+        """Drop the writes that are still waiting for their window to end."""
+        for task in self._tasks:
+            task.cancel()
+        for pending in self._pending.values():
+            pending.handle.cancel()
+            for future in pending.futures:
+                if not future.done():
+                    future.set_exception(
+                        VictronWriteError("Connection to the GX device was closed")
+                    )
+        self._pending.clear()
@@ -0,0 +1,570 @@
+"""Benchmarks of the integration against the offline GX simulator.
+
+Each benchmark times the current code and a copy of the code it replaced on
+the same data, read from a VictronSimulator:
+
+    python -m scripts.benchmark poll --keys 100 1000 5000
+
+Run from the root of the repository, it is not part of the integration.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+import gc
+import logging
+import statistics
+import tempfile
+import time
+
+from pymodbus.client import ModbusTcpClient
+
+from custom_components.victron import sensor
+from custom_components.victron.catalog import VictronEntityCatalog
+from custom_components.victron.codec import (
+    STRUCT_FORMATS,
+    decode_number,
+    decode_string,
+    word_count,
+)
+from custom_components.victron.const import (
+    DOMAIN,
+    STRING,
+    RegisterInfo,
+    register_info_dict,
+)
+from custom_components.victron.coordinator import victronEnergyDeviceUpdateCoordinator
+from custom_components.victron.decoder import decode_plan
+from custom_components.victron.planner import plan_single_read
+from homeassistant.components.sensor import (
+    DOMAIN as SENSOR_DOMAIN,
+    SensorDeviceClass,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    PERCENTAGE,
+    UnitOfElectricCurrent,
+    UnitOfElectricPotential,
+    UnitOfEnergy,
+    UnitOfFrequency,
+    UnitOfPower,
+    UnitOfPressure,
+    UnitOfSpeed,
+    UnitOfTemperature,
+    UnitOfTime,
+    UnitOfVolume,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er, frame
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+from .simulator import VictronSimulator
+
+_LOGGER = logging.getLogger(__name__)
+
+# register sets only unit 100 serves, the synthetic units get the others
+SYSTEM_PREFIXES = ("settings", "system")
+
+
+def synthetic_topology(keys: int) -> dict[int, list[str]]:
+    """Return a topology serving at least the given number of keys.
+
+    Units from 1 upwards get every device register set in turn, so large
+    topologies look like sites with many chargers and batteries.
+    """
+    names = [
+        name for name in register_info_dict if not name.startswith(SYSTEM_PREFIXES)
+    ]
+    topology: dict[int, list[str]] = {}
+    seen: set[str] = set()
+    unit = 1
+    while len(seen) < keys:
+        for name in names:
+            topology.setdefault(unit, []).append(name)
+            seen.update(decode_plan(name, unit).keys)
+            if len(seen) >= keys:
+                break
+        unit += 1
+    return topology
+
+
+async def start_coordinator(
+    topology: dict, **kwargs
+) -> tuple[VictronSimulator, victronEnergyDeviceUpdateCoordinator]:
+    """Start a simulator and a coordinator polling it.
+
+    The hot-plug sweep is off, so only the register sets of the topology are
+    read.
+    """
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="victron_benchmark_"))
+    frame.async_setup(hass)
+    simulator = VictronSimulator(topology)
+    await simulator.start()
+    coordinator = victronEnergyDeviceUpdateCoordinator(
+        hass,
+        "127.0.0.1",
+        simulator.port,
+        {unit: list(names) for unit, names in simulator.topology.items()},
+        5,
+        hotplug_budget=0,
+        **kwargs,
+    )
+    return simulator, coordinator
+
+
+async def stop_coordinator(
+    simulator: VictronSimulator, coordinator: victronEnergyDeviceUpdateCoordinator
+) -> None:
+    """Close the coordinator and stop the simulator."""
+    coordinator.close()
+    await simulator.stop()
+
+
+class BenchmarkConfigEntry:
+    """The parts of a config entry the platforms use during setup."""
+
+    entry_id = "benchmark"
+
+    def async_on_unload(self, func) -> None:
+        """Ignore unload callbacks, the benchmark never unloads."""
+
+
+async def setup_sensors(coordinator: victronEnergyDeviceUpdateCoordinator) -> list:
+    """Run the sensor platform setup and return the sensors it added."""
+    hass = coordinator.hass
+    config_entry = BenchmarkConfigEntry()
+    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = coordinator
+    entities = []
+    await sensor.async_setup_entry(
+        hass, config_entry, lambda new, update_before_add=False: entities.extend(new)
+    )
+    return entities
+
+
+def timed(
+    func: Callable[[], object],
+    repeat: int,
+    setup: Callable[[], object] | None = None,
+) -> float:
+    """Return the median time of a call in milliseconds, setup runs untimed before each.
+
+    Like timeit, the garbage collector does not run during the calls.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return statistics.median(times) * 1000
+
+
+def legacy_convert_string(segment) -> str:
+    """Convert string words with pymodbus like the hub did before the codec."""
+    return ModbusTcpClient.convert_from_registers(
+        segment, ModbusTcpClient.DATATYPE.STRING, string_encoding="ascii"
+    ).split("\x00")[0]
+
+
+def legacy_convert_number(segment, dataType) -> int:
+    """Convert numeric words with pymodbus like the hub did before the codec.
+
+    The hub had no branch for 64 bit types, they use the same call here.
+    """
+    return ModbusTcpClient.convert_from_registers(
+        segment, data_type=ModbusTcpClient.DATATYPE[dataType.upper()]
+    )
+
+
+def legacy_parse_register_data(registers, name: str, unit) -> OrderedDict:
+    """Decode a register set like the coordinator did before the decode plans."""
+    decoded_data = OrderedDict()
+    offset = 0
+    for key, value in register_info_dict[name].items():
+        full_key = f"{unit}.{key}"
+        count = word_count(value.dataType)
+        segment = registers[offset : offset + count]
+        if isinstance(value.dataType, STRING):
+            decoded_data[full_key] = legacy_convert_string(segment)
+        else:
+            raw = legacy_convert_number(segment, value.dataType)
+            if value.unit == "" and value.scale == 1:
+                decoded_data[full_key] = round(raw)
+            else:
+                decoded_data[full_key] = raw / value.scale
+        offset += count
+    return decoded_data
+
+
+def legacy_poll(responses) -> dict:
+    """Decode a poll like the coordinator did, rebuilding the data per register set."""
+    parsed_data = OrderedDict()
+    unavailable_entities = OrderedDict()
+    for unit, name, _, data in responses:
+        parsed_data = OrderedDict(
+            list(parsed_data.items())
+            + list(legacy_parse_register_data(data.registers, name, unit).items())
+        )
+        for key in register_info_dict[name]:
+            unavailable_entities[str(unit) + "." + key] = True
+    return {"data": parsed_data, "availability": unavailable_entities}
+
+
+def decode_poll(coordinator, responses, full: bool) -> None:
+    """Decode a poll into the store of the coordinator."""
+    if full:
+        # every set decodes in full, like its words all changed
+        coordinator._raw_words.clear()  # noqa: SLF001
+    changed: set[str] = set()
+    for unit, _, block, data in responses:
+        coordinator.process_block(unit, block, data, changed)
+
+
+async def read_register_sets(coordinator) -> list:
+    """Read every register set of the coordinator once, one read per set."""
+    await coordinator.api.connect()
+    responses = []
+    for unit, names in coordinator.decodeInfo.items():
+        for name in names:
+            block = plan_single_read(name)
+            data = await coordinator.fetch_registers(unit, block.address, block.count)
+            responses.append((unit, name, block, data))
+    return responses
+
+
+async def benchmark_poll(args: argparse.Namespace) -> None:
+    """Time the decoding of one poll as the number of keys grows.
+
+    "before" rebuilds the data per register set, "full" decodes every set
+    into the store and "unchanged" is a poll in which no word changed.
+    """
+    print(f"{'keys':>6} {'before ms':>10} {'full ms':>10} {'unchanged ms':>13}")  # noqa: T201
+    for keys in args.keys:
+        simulator, coordinator = await start_coordinator(synthetic_topology(keys))
+        try:
+            responses = await read_register_sets(coordinator)
+        finally:
+            await stop_coordinator(simulator, coordinator)
+
+        decode_poll(coordinator, responses, True)
+        before = timed(partial(legacy_poll, responses), args.repeat)
+        full = timed(partial(decode_poll, coordinator, responses, True), args.repeat)
+        unchanged = timed(
+            partial(decode_poll, coordinator, responses, False), args.repeat
+        )
+        print(  # noqa: T201
+            f"{len(coordinator.store.index):>6} {before:>10.2f} {full:>10.2f} {unchanged:>13.2f}"
+        )
+
+
+class LegacyAccessSensor(sensor.VictronSensor):
+    """A sensor reading its data like the entities did before the data keys."""
+
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        full_key = str(self.description.slave) + "." + self.description.key
+        return self.coordinator.processed_data()["availability"][full_key]
+
+    @property
+    def value(self):
+        """Return the current value of the entity."""
+        return self.description.value_fn(
+            self.coordinator.processed_data(),
+            self.description.slave,
+            self.description.key,
+        )
+
+
+def write_states(entities) -> None:
+    """Handle a coordinator update in which every value changed."""
+    for entity in entities:
+        entity._handle_coordinator_update()  # noqa: SLF001
+
+
+def read_accessors(entities) -> None:
+    """Read availability and value of every entity, like a state write does."""
+    for entity in entities:
+        if entity.available:
+            entity.value  # noqa: B018
+
+
+def change_values(coordinator: victronEnergyDeviceUpdateCoordinator) -> None:
+    """Change every numeric value in the store, so each write sets a new state."""
+    values = coordinator.store.values
+    for slot, value in enumerate(values):
+        if isinstance(value, (int, float)):
+            values[slot] = value + 1
+
+
+async def add_sensors(
+    coordinator: victronEnergyDeviceUpdateCoordinator, sensor_class
+) -> list:
+    """Add the sensors of a coordinator to an entity platform of its hass."""
+    hass = coordinator.hass
+    # the sensors are added to empty registries without a config entry
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    entities = [
+        sensor_class(coordinator, entity.description)
+        for entity in await setup_sensors(coordinator)
+    ]
+    platform = EntityPlatform(
+        hass=hass,
+        logger=_LOGGER,
+        domain=SENSOR_DOMAIN,
+        platform_name=DOMAIN,
+        platform=None,
+        scan_interval=timedelta(seconds=coordinator.interval),
+        entity_namespace=None,
+    )
+    await platform.async_add_entities(entities)
+    # keys read by two register sets (e.g. solarcharger_yield_user) give two
+    # sensors with the same unique id, the platform only adds the first
+    return [entity for entity in entities if entity.hass is not None]
+
+
+async def benchmark_state_writes(args: argparse.Namespace) -> None:
+    """Time the state writes of all sensors after an update in which every value changed.
+
+    Both variants run in a Home Assistant instance of their own, "before"
+    reads availability and value through processed_data() on every call.
+    The time of just those reads is reported per entity as well.
+    """
+    print(  # noqa: T201
+        f"{'sensors':>8} {'before writes/s':>16} {'after writes/s':>15}"
+        f" {'before ns/read':>15} {'after ns/read':>14}"
+    )
+    for keys in args.keys:
+        throughput = []
+        reads = []
+        for sensor_class in (LegacyAccessSensor, sensor.VictronSensor):
+            simulator, coordinator = await start_coordinator(synthetic_topology(keys))
+            # the benchmark refreshes by hand
+            coordinator.update_interval = None
+            try:
+                await coordinator.async_refresh()
+                entities = await add_sensors(coordinator, sensor_class)
+            finally:
+                await stop_coordinator(simulator, coordinator)
+            coordinator.changed_keys = None
+            elapsed = timed(
+                partial(write_states, entities),
+                args.repeat,
+                setup=partial(change_values, coordinator),
+            )
+            throughput.append(len(entities) / elapsed * 1000)
+            elapsed = timed(partial(read_accessors, entities), args.repeat)
+            reads.append(elapsed / len(entities) * 1e6)
+        print(  # noqa: T201
+            f"{len(entities):>8} {throughput[0]:>16.0f} {throughput[1]:>15.0f}"
+            f" {reads[0]:>15.0f} {reads[1]:>14.0f}"
+        )
+
+
+def legacy_determine_victron_device_class(name, unit):
+    """Determine the device class like the sensor platform did before the unit table."""
+    if unit == PERCENTAGE and "soc" in name:
+        return SensorDeviceClass.BATTERY
+    if unit == PERCENTAGE:
+        return None
+    if unit in [member.value for member in UnitOfPower]:
+        return SensorDeviceClass.POWER
+    if unit in [member.value for member in UnitOfEnergy]:
+        return SensorDeviceClass.ENERGY
+    if unit == UnitOfFrequency.HERTZ:
+        return SensorDeviceClass.FREQUENCY
+    if unit == UnitOfTime.SECONDS:
+        return SensorDeviceClass.DURATION
+    if unit in [member.value for member in UnitOfTemperature]:
+        return SensorDeviceClass.TEMPERATURE
+    if unit in [member.value for member in UnitOfVolume]:
+        return SensorDeviceClass.VOLUME_STORAGE
+    if unit in [member.value for member in UnitOfSpeed]:
+        if "meteo" in name:
+            return SensorDeviceClass.WIND_SPEED
+        return SensorDeviceClass.SPEED
+    if unit in [member.value for member in UnitOfPressure]:
+        return SensorDeviceClass.PRESSURE
+    if unit == UnitOfElectricPotential.VOLT:
+        return SensorDeviceClass.VOLTAGE
+    if unit == UnitOfElectricCurrent.AMPERE:
+        return SensorDeviceClass.CURRENT
+    return None
+
+
+def legacy_determine_stateclass(self):
+    """Determine the state class like RegisterInfo did before caching it."""
+    if self.unit == UnitOfEnergy.KILO_WATT_HOUR:
+        return SensorStateClass.TOTAL_INCREASING
+    if self.unit is None:
+        return None
+    return SensorStateClass.MEASUREMENT
+
+
+# the cached resolution, the sensor module refers to the legacy one meanwhile
+determine_victron_device_class = sensor.determine_victron_device_class
+
+
+@contextmanager
+def legacy_class_resolution() -> Iterator[None]:
+    """Resolve device and state classes like the sensor setup did before."""
+    stateclass = RegisterInfo.determine_stateclass
+    sensor.determine_victron_device_class = legacy_determine_victron_device_class
+    RegisterInfo.determine_stateclass = legacy_determine_stateclass
+    try:
+        yield
+    finally:
+        sensor.determine_victron_device_class = determine_victron_device_class
+        RegisterInfo.determine_stateclass = stateclass
+
+
+async def timed_setup(coordinator, repeat: int) -> tuple[float, list]:
+    """Return the median time of a cold sensor setup in milliseconds and its sensors."""
+    times = []
+    for _ in range(repeat):
+        # nothing is cached from the previous setup
+        coordinator.entity_catalog = VictronEntityCatalog(
+            coordinator.entity_catalog.advanced
+        )
+        determine_victron_device_class.cache_clear()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            entities = await setup_sensors(coordinator)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return statistics.median(times) * 1000, entities
+
+
+async def benchmark_setup(args: argparse.Namespace) -> None:
+    """Time the sensor platform setup of units that serve every register set.
+
+    "before" resolves the device and state class of every sensor like the
+    setup did before the lookup tables, both produce the same classes.
+    """
+    topology = {unit: list(register_info_dict) for unit in range(1, args.units + 1)}
+    simulator, coordinator = await start_coordinator(topology)
+    try:
+        await coordinator.async_refresh()
+    finally:
+        await stop_coordinator(simulator, coordinator)
+
+    with legacy_class_resolution():
+        before, legacy = await timed_setup(coordinator, args.repeat)
+    after, entities = await timed_setup(coordinator, args.repeat)
+    classes = [(entity.device_class, entity.state_class) for entity in entities]
+    if classes != [(entity.device_class, entity.state_class) for entity in legacy]:
+        raise RuntimeError("the device or state classes differ from before")
+    print(f"{'sensors':>8} {'before ms':>10} {'after ms':>10}")  # noqa: T201
+    print(f"{len(entities):>8} {before:>10.1f} {after:>10.1f}")  # noqa: T201
+
+
+def codec_samples(simulator: VictronSimulator) -> dict[str, list[list[int]]]:
+    """Return the words of every register of the simulator, by data type.
+
+    Words with the top bit set are added for each numeric type, so signed
+    values are decoded as well.
+    """
+    samples: dict[str, list[list[int]]] = {}
+    for unit, names in simulator.topology.items():
+        words = simulator.registers[unit]
+        for name in names:
+            for registerInfo in register_info_dict[name].values():
+                dataType = registerInfo.dataType
+                label = "string" if isinstance(dataType, STRING) else dataType
+                count = word_count(dataType)
+                samples.setdefault(label, []).append(
+                    [words[registerInfo.register + i] for i in range(count)]
+                )
+    for dataType in STRUCT_FORMATS:
+        count = word_count(dataType)
+        samples.setdefault(dataType, []).append([0xFFFF] * count)
+        samples[dataType].append([0x8000] + [0] * (count - 1))
+    return samples
+
+
+def convert_all(samples, convert) -> list:
+    """Convert every sample."""
+    return [convert(words) for words in samples]
+
+
+async def benchmark_codec(args: argparse.Namespace) -> None:
+    """Time the codec against ModbusTcpClient.convert_from_registers per data type.
+
+    The words are the register maps of the default simulator topology, the
+    codec has to give the same values as pymodbus for all of them.
+    """
+    simulator = VictronSimulator()
+    samples = codec_samples(simulator)
+    print(  # noqa: T201
+        f"{'type':>7} {'samples':>8} {'pymodbus ns':>12} {'codec ns':>9}"
+    )
+    for label, words in samples.items():
+        if label == "string":
+            legacy = legacy_convert_string
+            after = decode_string
+        else:
+            legacy = partial(legacy_convert_number, dataType=label)
+            after = partial(decode_number, dataType=label)
+        if convert_all(words, legacy) != convert_all(words, after):
+            raise RuntimeError(f"the codec decodes {label} differently")
+        # at least a thousand conversions per timed call
+        batch = words * -(-1000 // len(words))
+        elapsed = [
+            timed(partial(convert_all, batch, convert), args.repeat) / len(batch) * 1e6
+            for convert in (legacy, after)
+        ]
+        print(  # noqa: T201
+            f"{label:>7} {len(words):>8} {elapsed[0]:>12.0f} {elapsed[1]:>9.0f}"
+        )
+
+
+BENCHMARKS = {
+    "poll": benchmark_poll,
+    "state-writes": benchmark_state_writes,
+    "setup": benchmark_setup,
+    "codec": benchmark_codec,
+}
+
+
+def main() -> None:
+    """Run a benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmark", choices=BENCHMARKS)
+    parser.add_argument(
+        "--keys",
+        type=int,
+        nargs="+",
+        default=[100, 500, 1000, 2000, 5000],
+        help="number of register keys of the synthetic topologies",
+    )
+    parser.add_argument(
+        "--units",
+        type=int,
+        default=20,
+        help="number of units serving every register set, for the setup benchmark",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    # the generated words are no valid enum values, sensors log an error for those
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(BENCHMARKS[args.benchmark](args))
+
+
+if __name__ == "__main__":
+    main()
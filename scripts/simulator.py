@@ -0,0 +1,252 @@
+"""Offline Modbus TCP stand-in for a Victron GX device.
+
+Serves register maps generated from register_info_dict so the hub, the
+coordinator and discovery can be exercised without hardware:
+
+    python -m scripts.simulator --port 5020 --latency 0.02
+
+Run from the root of the repository, it is not part of the integration.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import json
+import logging
+from pathlib import Path
+import random
+import struct
+
+from custom_components.victron.codec import word_count
+from custom_components.victron.const import STRING, register_info_dict
+from custom_components.victron.planner import register_set_span
+
+_LOGGER = logging.getLogger(__name__)
+
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_REGISTER = 0x06
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+GATEWAY_TARGET_NO_RESPONSE = 0x0B
+
+MBAP_HEADER = struct.Struct(">HHHB")
+
+DEFAULT_TOPOLOGY = {
+    100: [
+        name
+        for name in register_info_dict
+        if name.startswith("system") or name == "settings_registers"
+    ],
+    227: ["vebus_registers", "vebus_registers_2"],
+    225: ["battery_registers", "battery_detail_registers"],
+    226: ["solarcharger_registers", "solarcharger_registers_2"],
+}
+
+
+@dataclass
+class SimulatorStats:
+    """Counters of the requests handled by the simulator."""
+
+    requests: int = 0
+    exceptions: int = 0
+    dropped: int = 0
+
+
+def build_register_map(unit, names) -> dict[int, int]:
+    """Generate deterministic register words for the register sets of a unit."""
+    words: dict[int, int] = {}
+    for name in names:
+        # registers in gaps inside a set are readable on the GX as well
+        start, count = register_set_span(register_info_dict[name])
+        for address in range(start, start + count):
+            words[address] = 0
+        for key, registerInfo in register_info_dict[name].items():
+            count = word_count(registerInfo.dataType)
+            if isinstance(registerInfo.dataType, STRING):
+                text = f"{key[:8]}{unit}".encode("ascii")[: count * 2]
+                raw = text.ljust(count * 2, b"\x00")
+                values = struct.unpack(f">{count}H", raw)
+            else:
+                # small values that decode to something plausible for every type
+                values = (0,) * (count - 1) + ((registerInfo.register * 7) % 100,)
+            for offset, value in enumerate(values):
+                words[registerInfo.register + offset] = value
+    return words
+
+
+class VictronSimulator:
+    """A Modbus TCP server answering like a GX device with the given topology.
+
+    ``topology`` has the same {unit: [register_set_names]} shape as the
+    SCAN_REGISTERS data of a config entry. Reads of a unit that is not in the
+    topology answer ``absent_unit_exception``, reads of registers the unit
+    does not serve answer illegal data address, like the GX does.
+    """
+
+    def __init__(
+        self,
+        topology: dict | None = None,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        drop_rate: float = 0.0,
+        absent_unit_exception: int = GATEWAY_TARGET_NO_RESPONSE,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the simulator."""
+        self.topology = {
+            int(unit): list(names)
+            for unit, names in (topology or DEFAULT_TOPOLOGY).items()
+        }
+        self.registers = {
+            unit: build_register_map(unit, names)
+            for unit, names in self.topology.items()
+        }
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.absent_unit_exception = absent_unit_exception
+        self.stats = SimulatorStats()
+        self._random = random.Random(seed)
+        self._server: asyncio.Server | None = None
+
+    @property
+    def port(self) -> int:
+        """Return the port the server listens on."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start listening, port 0 picks a free port."""
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        """Serve until cancelled."""
+        await self._server.serve_forever()
+
+    def set_register(self, unit: int, address: int, value: int) -> None:
+        """Change the word of a register."""
+        self.registers[unit][address] = value & 0xFFFF
+
+    def process_pdu(self, unit: int, pdu: bytes) -> bytes:
+        """Return the response PDU for a request PDU."""
+        self.stats.requests += 1
+        function = pdu[0]
+        words = self.registers.get(unit)
+        if words is None:
+            return self._exception(function, self.absent_unit_exception)
+
+        if function == READ_HOLDING_REGISTERS:
+            address, count = struct.unpack_from(">HH", pdu, 1)
+            try:
+                values = [words[address + i] for i in range(count)]
+            except KeyError:
+                return self._exception(function, ILLEGAL_DATA_ADDRESS)
+            return struct.pack(f">BB{count}H", function, count * 2, *values)
+
+        if function == WRITE_SINGLE_REGISTER:
+            address, value = struct.unpack_from(">HH", pdu, 1)
+            if address not in words:
+                return self._exception(function, ILLEGAL_DATA_ADDRESS)
+            words[address] = value
+            return pdu[:5]
+
+        return self._exception(function, ILLEGAL_FUNCTION)
+
+    def _exception(self, function: int, code: int) -> bytes:
+        self.stats.exceptions += 1
+        return bytes((function | 0x80, code))
+
+    def _delay(self) -> float:
+        return max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        # responses leave in request order, like the GX does
+        last_send = loop.time()
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                transaction, protocol, length, unit = MBAP_HEADER.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+
+                if self.drop_rate and self._random.random() < self.drop_rate:
+                    self.stats.dropped += 1
+                    _LOGGER.debug("dropping connection on transaction %s", transaction)
+                    writer.close()
+                    return
+
+                response = self.process_pdu(unit, pdu)
+                frame = (
+                    MBAP_HEADER.pack(transaction, protocol, len(response) + 1, unit)
+                    + response
+                )
+                last_send = max(last_send, loop.time() + self._delay())
+                loop.call_at(last_send, self._send, writer, frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if not writer.is_closing():
+                writer.close()
+
+    @staticmethod
+    def _send(writer: asyncio.StreamWriter, frame: bytes) -> None:
+        if not writer.is_closing():
+            writer.write(frame)
+
+
+async def _run(args: argparse.Namespace, topology: dict | None) -> None:
+    simulator = VictronSimulator(
+        topology,
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+    await simulator.start(args.host, args.port)
+    _LOGGER.info(
+        "Simulating units %s on %s:%s", list(simulator.topology), args.host, args.port
+    )
+    await simulator.serve_forever()
+
+
+def main() -> None:
+    """Run the simulator from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument(
+        "--topology",
+        help="json file with a {unit: [register_set_names]} mapping",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument(
+        "--drop-rate",
+        type=float,
+        default=0.0,
+        help="chance per request to drop the connection",
+    )
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    topology = None
+    if args.topology:
+        topology = json.loads(Path(args.topology).read_text(encoding="utf-8"))
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args, topology))
+
+
+if __name__ == "__main__":
+    main()